@@ -1,5 +1,6 @@
 import arcpy
 from engines.CompositeSourceCreatorEngine import CompositeSourceCreatorEngine
+from engines.ENCReaderEngine import OBJECT_CLASS_FILTERS, S57_PROFILES, SPATIAL_BACKENDS
 
 
 class CompositeSourceCreator:
@@ -27,6 +28,9 @@ class CompositeSourceCreator:
     def updateMessages(self, parameters):
         """Modify the messages created by internal validation for each tool
         parameter. This method is called after internal validation."""
+        param_lookup = self.setup_param_lookup(parameters)
+        if not param_lookup['enc_files'].value and not param_lookup['enc_exchange_set'].value:
+            param_lookup['enc_files'].setErrorMessage('Select ENC files or an ENC exchange set folder')
         return
 
     def execute(self, parameters, messages):
@@ -106,10 +110,143 @@ class CompositeSourceCreator:
             displayName="ENC File(s):",
             name="enc_files",
             datatype="DEFile",
-            parameterType="Required",
+            parameterType="Optional",
             direction="Input",
             multiValue=True
         )
+        enc_exchange_set = arcpy.Parameter(
+            displayName="ENC Exchange Set Folder (cells overlapping the sheets are read from CATALOG.031):",
+            name="enc_exchange_set",
+            datatype="DEFolder",
+            parameterType="Optional",
+            direction="Input"
+        )
+        enc_workers = arcpy.Parameter(
+            displayName="ENC Decoding Worker Processes:",
+            name="enc_workers",
+            datatype="GPLong",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_workers.filter.type = "Range"
+        enc_workers.filter.list = [1, 64]
+        enc_workers.value = 1
+        enc_split_cells = arcpy.Parameter(
+            displayName="Decode Large ENC Cells by Layer Across Workers:",
+            name="enc_split_cells",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_split_cells.value = False
+        enc_cache_folder = arcpy.Parameter(
+            displayName="ENC Cache Folder:",
+            name="enc_cache_folder",
+            datatype="DEFolder",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_s57_profile = arcpy.Parameter(
+            displayName="S-57 Driver Option Profile:",
+            name="enc_s57_profile",
+            datatype="GPString",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_s57_profile.filter.type = "ValueList"
+        enc_s57_profile.filter.list = list(S57_PROFILES.keys())
+        enc_s57_profile.value = list(S57_PROFILES.keys())[0]
+        enc_object_classes = arcpy.Parameter(
+            displayName="ENC Object Classes To Read:",
+            name="enc_object_classes",
+            datatype="GPString",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_object_classes.filter.type = "ValueList"
+        enc_object_classes.filter.list = OBJECT_CLASS_FILTERS
+        enc_object_classes.value = OBJECT_CLASS_FILTERS[0]
+        enc_spatial_pushdown = arcpy.Parameter(
+            displayName="Only Read ENC Features Near Sheets (far features are left out of failed layers):",
+            name="enc_spatial_pushdown",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_spatial_pushdown.value = False
+        enc_spatial_backend = arcpy.Parameter(
+            displayName="ENC Spatial Filter Backend:",
+            name="enc_spatial_backend",
+            datatype="GPString",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_spatial_backend.filter.type = "ValueList"
+        enc_spatial_backend.filter.list = SPATIAL_BACKENDS
+        enc_spatial_backend.value = SPATIAL_BACKENDS[0]
+        enc_memory_limit = arcpy.Parameter(
+            displayName="ENC Edge Geometry Batch Limit in MB, spatial filter and clipping only (0 for one batch):",
+            name="enc_memory_limit",
+            datatype="GPLong",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_memory_limit.filter.type = "Range"
+        enc_memory_limit.filter.list = [0, 1048576]
+        enc_memory_limit.value = 0
+        enc_sheet_join = arcpy.Parameter(
+            displayName="Tag Passed ENC Features With Their Sheet (needs shapely):",
+            name="enc_sheet_join",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_sheet_join.value = False
+        enc_clip_to_sheets = arcpy.Parameter(
+            displayName="Clip Passed ENC Lines and Polygons to the Sheets (needs shapely):",
+            name="enc_clip_to_sheets",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_clip_to_sheets.value = False
+        enc_skip_cells = arcpy.Parameter(
+            displayName="Skip ENC Cells Outside Sheets:",
+            name="enc_skip_cells",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_skip_cells.value = False
+        enc_deduplicate = arcpy.Parameter(
+            displayName="Remove Duplicate ENC Features (keeps the largest scale copy):",
+            name="enc_deduplicate",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_deduplicate.value = True
+        enc_composite = arcpy.Parameter(
+            displayName="Drop ENC Features Under Larger Scale Cell Coverage (needs shapely):",
+            name="enc_composite",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="ENC Reader Options"
+        )
+        enc_composite.value = False
         csf_prf_output_file = arcpy.Parameter(
             displayName="CSF, PRF & Tide .000 Output File Folder:",
             name="output_folder",
@@ -127,6 +264,20 @@ class CompositeSourceCreator:
             boundary_baseline_shapefile,
             # tides_mapinfo_tab,
             enc_file,
+            enc_exchange_set,
+            enc_workers,
+            enc_split_cells,
+            enc_cache_folder,
+            enc_s57_profile,
+            enc_object_classes,
+            enc_spatial_pushdown,
+            enc_spatial_backend,
+            enc_memory_limit,
+            enc_sheet_join,
+            enc_clip_to_sheets,
+            enc_skip_cells,
+            enc_deduplicate,
+            enc_composite,
             csf_prf_output_file
         ]
     
@@ -154,6 +305,20 @@ class CompositeSourceCreator:
             'maritime_boundary_baselines',
             # 'tides',
             'enc_files',
+            'enc_exchange_set',
+            'enc_workers',
+            'enc_split_cells',
+            'enc_cache_folder',
+            'enc_s57_profile',
+            'enc_object_classes',
+            'enc_spatial_pushdown',
+            'enc_spatial_backend',
+            'enc_memory_limit',
+            'enc_sheet_join',
+            'enc_clip_to_sheets',
+            'enc_skip_cells',
+            'enc_deduplicate',
+            'enc_composite',
             'output_folder'
         ]
 
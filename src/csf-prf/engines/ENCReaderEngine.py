@@ -1,28 +1,64 @@
 import pathlib
-import json
 import arcpy
 import os
+import time
 import yaml
+import numpy as np
+
+from itertools import repeat
 
-from osgeo import ogr
 from engines.Engine import Engine
-from engines.class_code_lookup import class_codes as CLASS_CODES
+from helpers.enc_catalog import find_catalog, read_catalog
+from helpers.enc_clipping import clip_store
+from helpers.enc_compositing import get_covered_mask, get_duplicate_mask, get_foid_keys, get_sounding_keys, get_usage_band
+from helpers.enc_coverage import extents_intersect, get_bounds_mask, get_cell_extent
+from helpers.enc_decoder import decode_enc_file, get_process_pool, is_enc_cached, merge_cells, read_enc_file
+from helpers.enc_index import get_layer_groups, read_cell_indexes
+from helpers.enc_updates import get_base_path
+from helpers.feature_store import Column, FeatureStore, SoundingsTable
+from helpers.iso8211 import READ_ERRORS
+from helpers.s57_catalog import get_catalog
+from helpers.sheets_footprint import SheetsFootprint
+from helpers.spatial import check_shapely, get_geometries, get_points, get_polygons, shapely
+from helpers.spatial_tiles import GEOMETRY_OVERHEAD, get_geometry_sizes, get_tile_batches
 arcpy.env.overwriteOutput = True
 
 
 INPUTS = pathlib.Path(__file__).parents[3] / 'inputs'
 OUTPUTS = pathlib.Path(__file__).parents[3] / 'outputs'
+ESRI_TYPES = {'Point': 'POINT', 'LineString': 'POLYLINE', 'Polygon': 'POLYGON'}
+LAYER_NAMES = {'Point': 'points', 'LineString': 'lines', 'Polygon': 'polygons'}
+OBJECT_CLASS_FILTERS = ['All object classes', 'Skip metadata and cartographic classes', 'Investigation classes only']
+SHEET_FIELDS = ['scale', 'priority', 'registry_n']  # Sheet values joined to passed features, as well as sheet_id
+SPATIAL_BACKENDS = ['ArcGIS (SelectLayerByLocation)', 'shapely (GEOS prepared footprint)']
+INVREQ_RULE_CLASSES = ['LNDARE', 'MORFAC', 'OBSTRN', 'SBDARE', 'SLCONS', 'UWTROC']  # invreq set by attribute rules
+EXTENT_MARGIN = 0.001  # degrees, covers reprojection differences along sheet edges
+S57_PROFILES = {
+    # SOUNDG stays one 3D multipoint per feature and is exploded with depth by the decoder
+    'Multipoint soundings': 'SPLIT_MULTIPOINT=OFF',
+    # Only drops the LNAM_REFS/FFPT_RIND fields, nothing downstream uses them, other options are the GDAL defaults
+    'Multipoint soundings without LNAM references': 'SPLIT_MULTIPOINT=OFF,LNAM_REFS=OFF',
+    # One Point feature per sounding with a DEPTH attribute, the original tool output
+    'Split soundings with depth': 'SPLIT_MULTIPOINT=ON,ADD_SOUNDG_DEPTH=ON'
+}
+
+
+class ENCReaderException(Exception):
+    """Custom exception for the ENC reader"""
+
+    pass
 
 
 class ENCReaderEngine(Engine):
     def __init__(self, param_lookup: dict, sheets_layer):
         self.param_lookup = param_lookup
         self.sheets_layer = sheets_layer
-        self.driver = None
+        self.footprint = None
+        self.enc_updates = {}
         self.geometries = {
-            'Point': {'features': [], 'layers': {'passed': None, 'failed': None}},
-            'LineString': {'features': [], 'layers': {'passed': None, 'failed': None}},
-            'Polygon': {'features': [], 'layers': {'passed': None, 'failed': None}}
+            'Point': {'features': FeatureStore.empty('Point'), 'soundings': SoundingsTable.empty(), 'layers': {'passed': None, 'failed': None}},
+            'LineString': {'features': FeatureStore.empty('LineString'), 'layers': {'passed': None, 'failed': None}},
+            'Polygon': {'features': FeatureStore.empty('Polygon'), 'layers': {'passed': None, 'failed': None}}
         }
 
     def add_columns(self):
@@ -33,16 +69,15 @@ class ENCReaderEngine(Engine):
         self.add_invreq_column()
 
     def add_asgnmt_column(self):
-        """Populate the 'asgnmt' column for all feature layers"""
+        """Populate the 'asgnmt' column for all feature types, 2 for passed and 1 for failed"""
 
         arcpy.AddMessage(" - Adding 'asgnmt' column")
         for feature_type in self.geometries.keys():
-            # Passed layers
-            self.add_column_and_constant(self.geometries[feature_type]['layers']['passed'], 'asgnmt', 2)
-            
-            # Failed layers
-            self.add_column_and_constant(self.geometries[feature_type]['layers']['failed'], 'asgnmt', 1)
-            
+            features = self.geometries[feature_type]['features']
+            features.set_column('asgnmt', np.where(features.passed, 2, 1).tolist())
+        soundings = self.geometries['Point']['soundings']
+        soundings.set_column('asgnmt', np.where(soundings.passed, 2, 1).tolist())
+
     def add_invreq_column(self):
         """Add and populate the investigation required column for allowed features"""
 
@@ -52,165 +87,582 @@ class ENCReaderEngine(Engine):
 
         for feature_type in self.geometries.keys():
             arcpy.AddMessage(f" - Adding 'invreq' column: {feature_type}")
-            self.add_column_and_constant(self.geometries[feature_type]['layers']['passed'], 'invreq', nullable=True)
-            self.add_column_and_constant(self.geometries[feature_type]['layers']['failed'], 'invreq', nullable=True)
-            self.set_passed_invreq(feature_type, objl_lookup, invreq_options)
-            self.set_failed_invreq(feature_type, objl_lookup, invreq_options)
+            features = self.geometries[feature_type]['features']
+            invreq = [None] * len(features)
+            self.set_passed_invreq(feature_type, features, np.flatnonzero(features.passed), objl_lookup, invreq_options, invreq)
+            self.set_failed_invreq(feature_type, features, np.flatnonzero(~features.passed), objl_lookup, invreq_options, invreq)
+            features.set_column('invreq', invreq)
+
+        # Soundings share their parent's attributes, so work out both outcomes per parent and pick per sounding
+        soundings = self.geometries['Point']['soundings']
+        parents = soundings.parents
+        passed_invreq = [None] * len(parents)
+        failed_invreq = [None] * len(parents)
+        self.set_passed_invreq('Point', parents, np.arange(len(parents)), objl_lookup, invreq_options, passed_invreq)
+        self.set_failed_invreq('Point', parents, np.arange(len(parents)), objl_lookup, invreq_options, failed_invreq)
+        parent_index = soundings.parent_index
+        invreq = np.where(soundings.passed, np.array(passed_invreq, dtype=object)[parent_index], np.array(failed_invreq, dtype=object)[parent_index])
+        soundings.set_column('invreq', invreq.tolist())
 
     def add_objl_string(self):
         """Convert OBJL number to string name"""
 
-        for feature_type in self.geometries.keys():
-            self.add_column_and_constant(self.geometries[feature_type]['layers']['passed'], 'OBJL_NAME', nullable=True)
-            self.add_column_and_constant(self.geometries[feature_type]['layers']['failed'], 'OBJL_NAME', nullable=True)
-            
-            for value in ['passed', 'failed']:
-                with arcpy.da.UpdateCursor(self.geometries[feature_type]['layers'][value], ["OBJL", "OBJL_NAME"]) as updateCursor:
-                    for row in updateCursor:
-                        row[1] = CLASS_CODES.get(int(row[0]), CLASS_CODES['OTHER'])[0]
-                        updateCursor.updateRow(row)
+        catalog = get_catalog()
+        stores = [self.geometries[feature_type]['features'] for feature_type in self.geometries.keys()]
+        for features in stores + [self.geometries['Point']['soundings'].parents]:
+            objl = features.columns.get('OBJL')
+            if objl is None:
+                features.set_column('OBJL_NAME', [None] * len(features))
+            elif objl.dictionary is not None:
+                # Dictionary encoded, so only look up each unique OBJL once
+                features.columns['OBJL_NAME'] = Column(objl.values, objl.nulls, catalog.get_acronyms(objl.dictionary))
+            else:
+                features.columns['OBJL_NAME'] = Column(catalog.get_acronyms(objl.values), objl.nulls)
+
+    def build_geometry_layer(self, feature_type, features, rows):
+        """
+        Create an in memory layer of feature shapes used for the spatial selection
+        :param str feature_type: Point, LineString, or Polygon
+        :param FeatureStore features: Features of that geometry type
+        :param numpy.ndarray rows: Indexes of the features to add
+        :returns (arcpy.FeatureLayer, numpy.ndarray): Layer and the ObjectID of each added feature in rows order
+        """
+
+        self.delete_memory_layer(rf'memory\{LAYER_NAMES[feature_type]}_layer', f'{LAYER_NAMES[feature_type]}_selection')
+        feature_class = arcpy.management.CreateFeatureclass('memory', f'{LAYER_NAMES[feature_type]}_layer', ESRI_TYPES[feature_type],
+                                                            spatial_reference=arcpy.SpatialReference(4326))
+        object_ids = np.empty(len(rows), dtype=np.int64)
+        shape_field = 'SHAPE@XY' if feature_type == 'Point' else 'SHAPE@WKB'
+        with arcpy.da.InsertCursor(feature_class, [shape_field]) as cursor:
+            for position, row in enumerate(rows.tolist()):
+                object_ids[position] = cursor.insertRow([self.get_shape(features, row)])
+        layer = arcpy.management.MakeFeatureLayer(feature_class, f'{LAYER_NAMES[feature_type]}_selection')[0]
+        return layer, object_ids
+
+    def build_soundings_layer(self, soundings, rows):
+        """
+        Create an in memory layer of soundings in one bulk call for the spatial selection
+        :param SoundingsTable soundings: Exploded SOUNDG points
+        :param numpy.ndarray rows: Indexes of the soundings to add
+        :returns arcpy.FeatureLayer: Layer with a 'sounding' field holding the index of each point
+        """
+
+        array = np.rec.fromarrays([soundings.x[rows], soundings.y[rows], rows.astype(np.int32)], names=['x', 'y', 'sounding'])
+        feature_class = r'memory\soundings_layer'
+        # NumPyArrayToFeatureClass never overwrites, even with arcpy.env.overwriteOutput
+        self.delete_memory_layer(feature_class, 'soundings_selection')
+        arcpy.da.NumPyArrayToFeatureClass(array, feature_class, ('x', 'y'), arcpy.SpatialReference(4326))
+        return arcpy.management.MakeFeatureLayer(feature_class, 'soundings_selection')[0]
+
+    def clip_to_sheets(self) -> None:
+        """Trim passed lines and polygons that cross a sheet edge to the sheets footprint, tagging them 'clipped'"""
+
+        check_shapely('Clipping to sheets')
+        start = time.time()
+        footprint = self.get_sheets_footprint()
+        memory_limit = self.get_memory_limit()
+        for feature_type in ['LineString', 'Polygon']:
+            features, clipped = clip_store(self.geometries[feature_type]['features'], footprint, memory_limit)
+            self.geometries[feature_type]['features'] = features
+            arcpy.AddMessage(f' - Clipped {clipped} {feature_type} features to the sheets')
+        arcpy.AddMessage(f' - Clipped features to the sheets in {time.time() - start:.1f}s')
+
+    def composite_usage_bands(self, bands, coverages) -> None:
+        """
+        Drop features of lower usage band cells that lie inside the M_COVR coverage of a higher band cell
+        :param dict[str[numpy.ndarray]] bands: Usage band of every feature by geometry type, MultiPoint for soundings
+        :param dict[int[list]] coverages: M_COVR polygon rings by usage band
+        """
+
+        start = time.time()
+        coverages = {band: get_polygons(polygons) for band, polygons in coverages.items()}
+        removed = 0
+        for geom_type in bands.keys():
+            covered = get_covered_mask(get_geometries(self.get_band_store(geom_type)), bands[geom_type], coverages)
+            self.take_band_store(geom_type, ~covered)
+            bands[geom_type] = bands[geom_type][~covered]
+            removed += int(covered.sum())
+        arcpy.AddMessage(f' - Removed {removed} ENC features under higher usage band coverage in {time.time() - start:.1f}s')
+
+    def delete_memory_layer(self, feature_class, layer_name) -> None:
+        """
+        Remove the memory feature class and layer left by a previous batch or run
+        :param str feature_class: Memory workspace feature class path
+        :param str layer_name: Feature layer name made from the feature class
+        """
+
+        for dataset in [layer_name, feature_class]:
+            if arcpy.Exists(dataset):
+                arcpy.management.Delete(dataset)
 
     def get_all_fields(self, features):
         """
-        Build a unique list of all field names
-        :param dict[dict[str]]: GeoJSON of string values for all features
-        :returns set[str]: Unique list of all fields
+        Get all field names for a geometry type
+        :param FeatureStore|SoundingsTable features: Columnar features of one geometry type
+        :returns list[str]: Unique list of all fields in column order
         """
-        
-        fields = set()
-        for feature in features:
-            for field in feature['geojson']['properties'].keys():
-                fields.add(field)
-        return fields
+
+        return features.fields
 
     def get_enc_geometries(self) -> None:
-        """Read and store all features from ENC file"""
+        """Read and store all features from ENC files, optionally with a pool of worker processes"""
+
+        enc_files = self.get_enc_files()
+        if self.get_option('enc_skip_cells', False):
+            enc_files = self.get_overlapping_cells(enc_files)
+        cache_folder = self.get_option('enc_cache_folder')
+        cache_folder = str(cache_folder) if cache_folder else None
+        split_cells = self.get_option('enc_split_cells', False)
+        workers = max(1, self.get_option('enc_workers', 1))
+        workers = workers if split_cells else min(workers, len(enc_files))
+        options = self.get_read_options()
+        # Only splitting cells needs their feature counts, the index scan is skipped otherwise
+        indexes = self.print_cell_indexes(enc_files) if split_cells and workers > 1 else {}
+        # Exchange set cells take the updates listed in the catalog, others the updates next to them
+        update_paths = [self.enc_updates.get(enc_path) for enc_path in enc_files]
+        start = time.time()
+        if workers > 1:
+            arcpy.AddMessage(f' - Decoding {len(enc_files)} ENC files with {workers} worker processes')
+            with get_process_pool(workers) as pool:
+                if split_cells:
+                    cells = self.read_split_cells(pool, workers, enc_files, indexes, cache_folder, options)
+                else:
+                    # map() keeps results in enc_files order
+                    cells = list(pool.map(read_enc_file, enc_files, repeat(cache_folder), repeat(options), update_paths))
+        else:
+            cells = map(read_enc_file, enc_files, repeat(cache_folder), repeat(options), update_paths)
+
+        cache_status = {'hit': 0, 'updated': 0, 'miss': 0, None: 0}
+        stores = {geom_type: [] for geom_type in self.geometries.keys()}
+        soundings = []
+        bands = {geom_type: [] for geom_type in list(self.geometries.keys()) + ['MultiPoint']}
+        coverages = {}
+        for enc_path, cell in zip(enc_files, cells):
+            cache_status[cell['cache']] += 1
+            coverages.setdefault(get_usage_band(enc_path), []).extend(cell['coverage'])
+            for geom_type in self.geometries.keys():
+                stores[geom_type].append(cell[geom_type])
+            soundings.append(cell['MultiPoint'])
+            for geom_type, geom_bands in bands.items():
+                count = len(cell['MultiPoint'].parents) if geom_type == 'MultiPoint' else len(cell[geom_type])
+                geom_bands.append(np.full(count, get_usage_band(enc_path), dtype=np.int64))
+            for geom_type in cell['unknown']:
+                arcpy.AddMessage(f'Unknown feature type: {geom_type}')
+        for geom_type in self.geometries.keys():
+            self.geometries[geom_type]['features'] = FeatureStore.concat([self.geometries[geom_type]['features']] + stores[geom_type])
+        self.geometries['Point']['soundings'] = SoundingsTable.concat([self.geometries['Point']['soundings']] + soundings)
+        arcpy.AddMessage(f' - Read {len(enc_files)} ENC files in {time.time() - start:.1f}s')
+        if cache_folder:
+            arcpy.AddMessage(f" - ENC cache: {cache_status['hit']} hits, {cache_status['updated']} updated, "
+                             f"{cache_status['miss']} misses ({cache_folder})")
+        bands = {geom_type: np.concatenate(geom_bands or [np.empty(0, dtype=np.int64)]) for geom_type, geom_bands in bands.items()}
+        if self.get_option('enc_deduplicate', True):
+            bands = self.remove_duplicates(bands)
+        if self.get_option('enc_composite', False):
+            self.composite_usage_bands(bands, coverages)
+
+    def get_band_store(self, geom_type):
+        """
+        Get the store that usage bands are tracked for
+        :param str geom_type: Point, LineString, Polygon, or MultiPoint for SOUNDG parents
+        :returns FeatureStore: Columnar features
+        """
+
+        if geom_type == 'MultiPoint':
+            return self.geometries['Point']['soundings'].parents
+        return self.geometries[geom_type]['features']
+
+    def get_enc_files(self):
+        """
+        Get the base cells to read from the ENC files and exchange set parameters
+        - Update files are swapped for their base cell, which picks up all updates next to it
+        - Exchange set cells are read with the updates listed in the catalog, see get_exchange_set_cells()
+        :returns list[str]: Unique .000 base cell paths in parameter order
+        """
+
+        enc_files = []
+        if self.param_lookup['enc_files'].valueAsText:
+            enc_files += self.param_lookup['enc_files'].valueAsText.replace("'", "").split(';')
+        exchange_set = self.get_option('enc_exchange_set')
+        if exchange_set:
+            enc_files += self.get_exchange_set_cells(str(exchange_set))
+        if not enc_files:
+            raise ENCReaderException('No ENC files selected and no exchange set cells overlap the sheets')
+        return list(dict.fromkeys(get_base_path(enc_path) for enc_path in enc_files))
+
+    def get_exchange_set_cells(self, exchange_set):
+        """
+        Select the cells of an ENC exchange set that overlap the sheets
+        - Cell bounds come from CATALOG.031, so cells are not opened
+        - Cells without bounds in the catalog are always selected
+        - The catalog updates of each cell are kept in enc_updates, they may sit in other folders than the base cell
+        :param str exchange_set: Exchange set root folder
+        :returns list[str]: Base cell paths in catalog order
+        """
+
+        catalog_path = find_catalog(exchange_set)
+        if catalog_path is None:
+            raise ENCReaderException(f'No CATALOG.031 found in exchange set: {exchange_set}')
+        sheet_extents = self.get_sheet_extents()
+        cells = [cell for cell in read_catalog(catalog_path) if os.path.exists(cell['path'])]
+        selected = [cell for cell in cells if cell['bounds'] is None or extents_intersect(cell['bounds'], sheet_extents)]
+        arcpy.AddMessage(f' - Exchange set: {len(selected)} of {len(cells)} cells in {catalog_path.name} overlap the sheets')
+        for cell in selected:
+            arcpy.AddMessage(f"   - {pathlib.Path(cell['path']).name}: {len(cell['updates'])} updates")
+            updates = [update for update in cell['updates'] if os.path.exists(update)]
+            if len(updates) < len(cell['updates']):
+                arcpy.AddMessage(f"     {len(cell['updates']) - len(updates)} updates listed in the catalog are missing")
+            self.enc_updates[cell['path']] = updates
+        return [cell['path'] for cell in selected]
+
+    def get_shape(self, features, row):
+        """
+        Get the value for a SHAPE@XY or SHAPE@WKB cursor field without building arcpy geometry
+        :param FeatureStore features: Columnar features of one geometry type
+        :param int row: Feature index
+        :returns tuple[float]|bytearray: XY for points, WKB with all rings for lines and polygons
+        """
+
+        if features.geom_type == 'Point':
+            return tuple(features.get_rings(row)[0][0].tolist())
+        return bytearray(features.get_wkb(row))
+
+    def get_sheet_extents(self):
+        """
+        Get a coarse multi-envelope of the sheets for the OGR spatial filter
+        - Features touching an envelope are still tested exactly against the sheets by perform_spatial_filter()
+        :returns list[tuple[float]]: WGS84 XMin, YMin, XMax, YMax of each sheet, padded by EXTENT_MARGIN
+        """
+
+        extents = []
+        with arcpy.da.SearchCursor(self.sheets_layer, ['SHAPE@'], spatial_reference=arcpy.SpatialReference(4326)) as cursor:
+            for sheet, in cursor:
+                if sheet is None:
+                    continue
+                extent = sheet.extent
+                extents.append((extent.XMin - EXTENT_MARGIN, extent.YMin - EXTENT_MARGIN,
+                                extent.XMax + EXTENT_MARGIN, extent.YMax + EXTENT_MARGIN))
+        return extents
+
+    def get_sheet_geometries(self):
+        """
+        Read the sheet polygons as shapely geometry with the sheet values features can be joined to
+        :returns (numpy.ndarray, dict[str[numpy.ndarray]]): WGS84 shapely geometry of each sheet, and sheet_id and SHEET_FIELDS values
+        """
+
+        check_shapely('The sheets footprint')
+        names = {field.name.lower(): field.name for field in arcpy.ListFields(self.sheets_layer)}
+        fields = [field for field in SHEET_FIELDS if field in names]
+        wkb = []
+        values = []
+        cursor_fields = ['SHAPE@WKB', 'OID@'] + [names[field] for field in fields]
+        with arcpy.da.SearchCursor(self.sheets_layer, cursor_fields, spatial_reference=arcpy.SpatialReference(4326)) as cursor:
+            for sheet, *sheet_values in cursor:
+                if sheet is not None:
+                    wkb.append(bytes(sheet))
+                    values.append(sheet_values)
+        columns = list(zip(*values)) or [[] for _ in cursor_fields[1:]]
+        attributes = {field: np.array(column, dtype=object) for field, column in zip(['sheet_id'] + fields, columns)}
+        return shapely.from_wkb(np.array(wkb, dtype=object)), attributes
+
+    def get_sheets_footprint(self):
+        """
+        Build the dissolved and prepared sheets footprint, once per run
+        :returns SheetsFootprint|None: Footprint, None if shapely is not installed for the ArcGIS backend
+        """
+
+        if self.footprint is None and shapely is not None:
+            start = time.time()
+            self.footprint = SheetsFootprint(*self.get_sheet_geometries())
+            arcpy.AddMessage(f' - Built the footprint of {len(self.footprint)} sheets in {time.time() - start:.1f}s')
+        return self.footprint
+
+    def get_spatial_candidates(self, footprint, sheet_extents, bounds, passed):
+        """
+        Reject or pass features by their bbox, leaving only those that need an exact test
+        - Without a footprint every feature touching a padded sheet envelope is a candidate
+        - The footprint is WGS84 but the exact test uses the sheets projection, so features within EXTENT_MARGIN of its edges are left to it
+        :param SheetsFootprint footprint: Sheets footprint, or None without shapely
+        :param list[tuple[float]] sheet_extents: Padded sheet envelopes, used without a footprint
+        :param numpy.ndarray bounds: XMin, YMin, XMax, YMax of each feature
+        :param numpy.ndarray passed: Passed mask, features inside the footprint are set in place
+        :returns numpy.ndarray: Indexes of features along the sheet edges
+        """
+
+        if footprint is None:
+            return np.flatnonzero(get_bounds_mask(bounds, sheet_extents))
+        inside, _, edge = footprint.classify(bounds, EXTENT_MARGIN)
+        passed[inside] = True
+        return np.flatnonzero(edge)
+
+    def get_skipped_layers(self):
+        """
+        Get the S-57 object classes whose OGR layers are not read
+        - Metadata (M_), collection (C_) and cartographic ($) classes and the DSID layer never get an invreq
+        - Investigation classes are those with an invreq in invreq_lookup.yaml or set by attribute rules
+        :returns list[str]: Sorted OGR layer names to skip
+        """
 
-        enc_files = self.param_lookup['enc_files'].valueAsText.replace("'", "").split(';')
+        object_classes = self.get_option('enc_object_classes', OBJECT_CLASS_FILTERS[0])
+        acronyms = set(get_catalog().class_codes.keys())
+        if object_classes == OBJECT_CLASS_FILTERS[1]:
+            skipped = {acronym for acronym in acronyms if acronym.startswith(('M_', 'C_', '$'))}
+            skipped.add('DSID')
+        elif object_classes == OBJECT_CLASS_FILTERS[2]:
+            with open(str(INPUTS / 'invreq_lookup.yaml'), 'r') as lookup:
+                objl_lookup = yaml.safe_load(lookup)
+            kept = {acronym for acronym, values in objl_lookup.items() if isinstance(values, dict) and values.get('invreq') != ''}
+            skipped = acronyms.difference(kept, INVREQ_RULE_CLASSES)
+            skipped.add('DSID')
+        else:
+            skipped = set()
+        return sorted(skipped)
+
+    def get_memory_limit(self) -> int:
+        """
+        Get the memory limit for geometry built per batch of the exact spatial filter and clipping tests, negative values are treated as no limit
+        - Only features along the sheet edges are batched, decoded cells and the output layers are not bounded by it
+        :returns int: Bytes of built geometry allowed per batch, 0 for a single batch
+        """
+
+        return max(0, self.get_option('enc_memory_limit', 0)) * 1024 * 1024
+
+    def get_option(self, name, default=None):
+        """
+        Get the value of an optional tool parameter
+        :param str name: Parameter name from param_lookup
+        :param any default: Value used when the parameter is missing or empty
+        :returns any: Parameter value
+        """
+
+        param = self.param_lookup.get(name)
+        if param is None or param.value in [None, '']:
+            return default
+        return param.value
+
+    def get_overlapping_cells(self, enc_files):
+        """
+        Cheap pre-pass that drops cells whose extent does not touch any sheet
+        :param list[str] enc_files: Base cell paths
+        :returns list[str]: Base cell paths that overlap the sheets, in the same order
+        """
+
+        start = time.time()
+        sheet_extents = self.get_sheet_extents()
+        overlapping = []
+        skipped = []
         for enc_path in enc_files:
-            enc_file = self.open_file(enc_path)
-            for layer in enc_file:
-                for feature in layer:
-                    if feature:
-                        feature_json = json.loads(feature.ExportToJson())
-                        geom_type = feature_json['geometry']['type'] if feature_json['geometry'] else False  
-
-                        if geom_type in ['Point', 'LineString', 'Polygon']:
-                            self.geometries[geom_type]['features'].append({'geojson': feature_json})
-                        elif geom_type == 'MultiPoint':
-                            # MultiPoints are broken up now to single features with an ENV variable
-                            feature_template = json.loads(feature.ExportToJson())
-                            feature_template['geometry']['type'] = 'Point'
-                            for point in feature.geometry():
-                                feature_template['geometry']['coordinates'] = [point.GetX(), point.GetY()]  # XY
-                                self.geometries['Point']['features'].append({'geojson': feature_template})     
-                        else:
-                            if geom_type:
-                                arcpy.AddMessage(f'Unknown feature type: {geom_type}')
-        
-    def open_file(self, enc_path):
-        """
-        Open a single input ENC file
-        :param str enc_path: Path to an ENC file on disk
-        :returns GDAL.File: GDAL File object you can loop through
-        """
-
-        enc_file = self.driver.Open(enc_path, 0)
-        return enc_file
+            try:
+                extent = get_cell_extent(enc_path, self.enc_updates.get(enc_path))
+            except READ_ERRORS + (OSError,):
+                overlapping.append(enc_path)  # Unreadable or locked, leave it to OGR
+                continue
+            if extent is not None and extents_intersect(extent, sheet_extents):
+                overlapping.append(enc_path)
+            else:
+                skipped.append(pathlib.Path(enc_path).name)
+        arcpy.AddMessage(f' - Checked {len(enc_files)} ENC cell extents in {time.time() - start:.1f}s')
+        if skipped:
+            arcpy.AddMessage(f" - Skipped {len(skipped)} ENC cells outside the sheets: {', '.join(skipped)}")
+        return overlapping
+
+    def get_read_options(self):
+        """
+        Build the options passed to every ENC reader task
+        - Plain values only, so they pickle to worker processes and hash into cache keys
+        :returns dict: Reader options, see enc_decoder.get_layers()
+        """
+
+        options = {}
+        skip_layers = self.get_skipped_layers()
+        if skip_layers:
+            arcpy.AddMessage(f' - Skipping {len(skip_layers)} S-57 object classes')
+            options['skip_layers'] = skip_layers
+        if self.get_option('enc_spatial_pushdown', False):
+            options['extents'] = self.get_sheet_extents()
+            arcpy.AddMessage(f' - Only reading ENC features within {len(options["extents"])} sheet extents')
+        return options
+
+    def get_geometry(self, features, row):
+        """
+        Build the arcpy geometry of one feature
+        :param FeatureStore features: Columnar features of one geometry type
+        :param int row: Feature index
+        :returns arcpy.Geometry: PointGeometry, Polyline, or Polygon
+        """
+
+        if features.geom_type == 'Point':
+            x, y = features.get_rings(row)[0][0].tolist()
+            return arcpy.PointGeometry(arcpy.Point(X=x, Y=y), arcpy.SpatialReference(4326))
+        # WKB carries every ring, so polygon holes are kept
+        return arcpy.FromWKB(bytearray(features.get_wkb(row)), arcpy.SpatialReference(4326))
+
+    def join_sheets(self) -> None:
+        """Tag every passed feature with the sheet_id, scale, priority and registry_n of its largest scale sheet"""
+
+        check_shapely('Joining sheets')
+        start = time.time()
+        footprint = self.get_sheets_footprint()
+        for feature_type in self.geometries.keys():
+            features = self.geometries[feature_type]['features']
+            sheets = np.full(len(features), -1, dtype=np.int64)
+            rows = np.flatnonzero(features.passed)
+            sheets[rows] = footprint.join(get_geometries(features, rows))
+            for field, values in footprint.get_attributes(sheets).items():
+                features.set_column(field, values)
+
+        soundings = self.geometries['Point']['soundings']
+        sheets = np.full(len(soundings), -1, dtype=np.int64)
+        rows = np.flatnonzero(soundings.passed)
+        sheets[rows] = footprint.join(get_points(soundings.x[rows], soundings.y[rows]))
+        for field, values in footprint.get_attributes(sheets).items():
+            soundings.set_column(field, values)
+        arcpy.AddMessage(f' - Joined passed features to {len(footprint)} sheets in {time.time() - start:.1f}s')
 
     def perform_spatial_filter(self) -> None:
         """Spatial query all of the ENC features against Sheets boundary"""
 
         # sorted_sheets = arcpy.management.Sort(self.sheets_layer, r'memory\sorted_sheets', [["scale", "ASCENDING"]])
-        # POINTS
-        point_fields = self.get_all_fields(self.geometries['Point']['features'])
-        points_layer = arcpy.management.CreateFeatureclass('memory', 'points_layer', 'POINT', spatial_reference=arcpy.SpatialReference(4326))
-        for field in point_fields:
-            arcpy.management.AddField(points_layer, field, 'TEXT')
-
-        arcpy.AddMessage(' - Building point features')
-        for feature in self.geometries['Point']['features']:
-            current_fields = ['SHAPE@'] + list(feature['geojson']['properties'].keys())
-            # TODO this is slow to open new every time, but field names change
-            # Another option might be to have lookup by index and fill missing values to None
-            with arcpy.da.InsertCursor(points_layer, current_fields, explicit=True) as point_cursor: 
-                coords = feature['geojson']['geometry']['coordinates']
-                geometry = arcpy.PointGeometry(arcpy.Point(X=coords[0], Y=coords[1]), arcpy.SpatialReference(4326))
-                attribute_values = [str(attr) for attr in list(feature['geojson']['properties'].values())]
-                point_cursor.insertRow([geometry] + attribute_values)
-        points_passed = arcpy.management.SelectLayerByLocation(points_layer, 'INTERSECT', self.sheets_layer)
-        points_passed_layer = arcpy.management.MakeFeatureLayer(points_passed)
-        point_failed = arcpy.management.SelectLayerByLocation(points_passed_layer, selection_type='SWITCH_SELECTION')
-        self.geometries['Point']['layers']['passed'] = points_passed
-        self.geometries['Point']['layers']['failed'] = point_failed
-
-        # LINES
-        line_fields = self.get_all_fields(self.geometries['LineString']['features'])
-        lines_layer = arcpy.management.CreateFeatureclass('memory', 'lines_layer', 'POLYLINE', spatial_reference=arcpy.SpatialReference(4326))
-        for field in line_fields:
-            arcpy.management.AddField(lines_layer, field, 'TEXT')
-
-        arcpy.AddMessage(' - Building line features')
-        for feature in self.geometries['LineString']['features']:
-            current_fields = ['SHAPE@'] + list(feature['geojson']['properties'].keys())
-            with arcpy.da.InsertCursor(lines_layer, current_fields, explicit=True) as line_cursor: 
-                points = [arcpy.Point(coord[0], coord[1]) for coord in feature['geojson']['geometry']['coordinates']]
-                coord_array = arcpy.Array(points)
-                geometry = arcpy.Polyline(coord_array, arcpy.SpatialReference(4326))
-                attribute_values = [str(attr) for attr in list(feature['geojson']['properties'].values())]
-                line_cursor.insertRow([geometry] + attribute_values)
-        lines_passed = arcpy.management.SelectLayerByLocation(lines_layer, 'INTERSECT', self.sheets_layer)
-        lines_passed_layer = arcpy.arcpy.management.MakeFeatureLayer(lines_passed)
-        line_failed = arcpy.management.SelectLayerByLocation(lines_passed_layer, selection_type='SWITCH_SELECTION')
-        self.geometries['LineString']['layers']['passed'] = lines_passed
-        self.geometries['LineString']['layers']['failed'] = line_failed
-
-        # POLYGONS
-        polygons_fields = self.get_all_fields(self.geometries['Polygon']['features'])
-        polygons_layer = arcpy.management.CreateFeatureclass('memory', 'polygons_layer', 'POLYGON', spatial_reference=arcpy.SpatialReference(4326))
-        for field in polygons_fields:
-            arcpy.management.AddField(polygons_layer, field, 'TEXT')
-
-        arcpy.AddMessage(' - Building Polygon features')
-        for feature in self.geometries['Polygon']['features']:
-            current_fields = ['SHAPE@'] + list(feature['geojson']['properties'].keys())
-            with arcpy.da.InsertCursor(polygons_layer, current_fields, explicit=True) as polygons_cursor: 
-                polygons = feature['geojson']['geometry']['coordinates']
-                if len(polygons) > 1:
-                    points = [arcpy.Point(coord[0], coord[1]) for coord in polygons[0]]
-                else:
-                    points = [arcpy.Point(coord[0], coord[1]) for coord in feature['geojson']['geometry']['coordinates'][0]]
-                coord_array = arcpy.Array(points)
-                geometry = arcpy.Polygon(coord_array, arcpy.SpatialReference(4326))
-                attribute_values = [str(attr) for attr in list(feature['geojson']['properties'].values())]
-                polygons_cursor.insertRow([geometry] + attribute_values)
-        polygons_passed = arcpy.management.SelectLayerByLocation(polygons_layer, 'INTERSECT', self.sheets_layer)
-        polygons_passed_layer = arcpy.arcpy.management.MakeFeatureLayer(polygons_passed)
-        polygon_failed = arcpy.management.SelectLayerByLocation(polygons_passed_layer, selection_type='SWITCH_SELECTION')
-        self.geometries['Polygon']['layers']['passed'] = polygons_passed
-        self.geometries['Polygon']['layers']['failed'] = polygon_failed
+        use_shapely = self.get_option('enc_spatial_backend', SPATIAL_BACKENDS[0]) == SPATIAL_BACKENDS[1]
+        if use_shapely:
+            check_shapely('The shapely spatial filter')
+        footprint = self.get_sheets_footprint()
+        sheet_extents = self.get_sheet_extents() if footprint is None else None
+        memory_limit = self.get_memory_limit()
+        for feature_type in self.geometries.keys():
+            features = self.geometries[feature_type]['features']
+            if use_shapely:
+                features.passed = footprint.get_passed(features, memory_limit)
+                arcpy.AddMessage(f' - Filtered {len(features)} {feature_type} features with the sheets footprint')
+                continue
+            features.passed = np.zeros(len(features), dtype=bool)
+            candidates = self.get_spatial_candidates(footprint, sheet_extents, features.bounds, features.passed)
+            arcpy.AddMessage(f' - Building {len(candidates)} of {len(features)} {feature_type} features along the sheet edges')
+            if not len(candidates):
+                continue
+            batches = get_tile_batches(features.bounds[candidates], get_geometry_sizes(features, candidates), memory_limit)
+            if len(batches) > 1:
+                arcpy.AddMessage(f'   - In {len(batches)} tiled batches under {memory_limit // (1024 * 1024)} MB')
+            for batch in batches:
+                # Each batch replaces the memory layer of the last one
+                rows = candidates[batch]
+                layer, object_ids = self.build_geometry_layer(feature_type, features, rows)
+                arcpy.management.SelectLayerByLocation(layer, 'INTERSECT', self.sheets_layer)
+                passed_ids = [row[0] for row in arcpy.da.SearchCursor(layer, ['OID@'])]
+                features.passed[rows] = np.isin(object_ids, passed_ids)
+
+        soundings = self.geometries['Point']['soundings']
+        if use_shapely:
+            soundings.passed = footprint.contains_points(soundings.x, soundings.y)
+            arcpy.AddMessage(f' - Classified {len(soundings)} soundings with the sheets point grid')
+        else:
+            soundings.passed = np.zeros(len(soundings), dtype=bool)
+            bounds = np.column_stack([soundings.x, soundings.y, soundings.x, soundings.y])
+            candidates = self.get_spatial_candidates(footprint, sheet_extents, bounds, soundings.passed)
+            arcpy.AddMessage(f' - Building {len(candidates)} of {len(soundings)} soundings near the sheets')
+            batches = get_tile_batches(bounds[candidates], np.full(len(candidates), GEOMETRY_OVERHEAD), memory_limit) if len(candidates) else []
+            for batch in batches:
+                layer = self.build_soundings_layer(soundings, candidates[batch])
+                arcpy.management.SelectLayerByLocation(layer, 'INTERSECT', self.sheets_layer)
+                # Only the selected rows are read back from the layer
+                soundings.passed[arcpy.da.FeatureClassToNumPyArray(layer, ['sounding'])['sounding']] = True
 
     def print_geometries(self) -> None:
-        """Print GeoJSON of all features for review"""
+        """Print attributes of all features for review"""
 
         for feature_type in self.geometries.keys():
-            for feature in self.geometries[feature_type]:
-                arcpy.AddMessage(f"\n - {feature['type']}:{feature['geojson']}")
-    
+            features = self.geometries[feature_type]['features']
+            for values in features.rows(features.fields):
+                arcpy.AddMessage(f"\n - {feature_type}:{dict(zip(features.fields, values))}")
+
+    def print_cell_indexes(self, enc_files):
+        """
+        Print the edition, update and record counts of each cell from a quick ISO 8211 scan
+        :param list[str] enc_files: Base cell paths
+        :returns dict[str[dict]]: Cell index by base cell path, cells that could not be indexed are missing
+        """
+
+        start = time.time()
+        indexes, unreadable = read_cell_indexes(enc_files)
+        for index in indexes:
+            arcpy.AddMessage(f" - {index['name']}: edition {index['edition']}, update {index['update']} "
+                             f"(+{index['updates']} update files), {index['records']['features']} features, "
+                             f"{len(index['objl'])} object classes")
+        for enc_path in unreadable:
+            arcpy.AddMessage(f' - {pathlib.Path(enc_path).name}: could not be indexed, it will only be read by OGR')
+        arcpy.AddMessage(f' - Indexed {len(enc_files)} ENC cells in {time.time() - start:.1f}s')
+        return {index['path']: index for index in indexes}
+
     def print_feature_total(self) -> None:
         """Print total number of passed/failed features from ENC file"""
 
-        points = arcpy.management.GetCount(self.geometries['Point']['layers']['passed'])
-        lines = arcpy.management.GetCount(self.geometries['LineString']['layers']['passed'])
-        polygons = arcpy.management.GetCount(self.geometries['Polygon']['layers']['passed'])
+        points = int(self.geometries['Point']['features'].passed.sum())
+        soundings = self.geometries['Point']['soundings']
+        points += int(soundings.passed.sum())
+        lines = int(self.geometries['LineString']['features'].passed.sum())
+        polygons = int(self.geometries['Polygon']['features'].passed.sum())
         arcpy.AddMessage(f' - Found Points: {points}')
         arcpy.AddMessage(f' - Found Lines: {lines}')
         arcpy.AddMessage(f' - Found Polygons: {polygons}')
-        arcpy.AddMessage(f' - Total passed: {int(points[0]) + int(lines[0]) + int(polygons[0])}')
-        points = arcpy.management.GetCount(self.geometries['Point']['layers']['failed'])
-        lines = arcpy.management.GetCount(self.geometries['LineString']['layers']['failed'])
-        polygons = arcpy.management.GetCount(self.geometries['Polygon']['layers']['failed'])
-        arcpy.AddMessage(f' - Total failed: {int(points[0]) + int(lines[0]) + int(polygons[0])}')
+        arcpy.AddMessage(f' - Total passed: {points + lines + polygons}')
+        failed = sum(int((~self.geometries[feature_type]['features'].passed).sum()) for feature_type in self.geometries.keys())
+        failed += int((~soundings.passed).sum())
+        arcpy.AddMessage(f' - Total failed: {failed}')
+
+    def read_split_cells(self, pool, workers, enc_files, indexes, cache_folder, options):
+        """
+        Decode large cells on several workers at once, each with its own OGR handle reading a group of layers
+        - Workers are shared out by feature count, so one enormous cell gets all of them
+        - Cached cells, even those cached before their newest updates, and cells that could not be indexed are read whole
+        :param ProcessPoolExecutor pool: Worker processes
+        :param int workers: Number of worker processes
+        :param list[str] enc_files: Base cell paths
+        :param dict[str[dict]] indexes: Cell index by base cell path
+        :param str cache_folder: Optional folder of cached cells
+        :param dict options: Reader options
+        :returns list[dict]: Decoded cells in enc_files order
+        """
+
+        total = sum(index['records']['features'] for index in indexes.values()) or 1
+        tasks = []
+        for enc_path in enc_files:
+            index = indexes.get(enc_path)
+            groups = get_layer_groups(index['objl'], round(workers * index['records']['features'] / total)) if index else []
+            update_paths = self.enc_updates.get(enc_path)
+            if len(groups) < 2 or is_enc_cached(enc_path, cache_folder, options, update_paths):
+                tasks.append([pool.submit(read_enc_file, enc_path, cache_folder, options, update_paths)])
+                continue
+            arcpy.AddMessage(f' - Decoding {pathlib.Path(enc_path).name} as {len(groups)} layer groups')
+            # The first task reads every layer not given to another group, including any missing from the index
+            exclude = sorted(set().union(*groups[1:]))
+            tasks.append([pool.submit(decode_enc_file, enc_path, options, None, exclude, update_paths)] +
+                         [pool.submit(decode_enc_file, enc_path, options, group, (), update_paths) for group in groups[1:]])
+        cells = []
+        for enc_path, cell_tasks in zip(enc_files, tasks):
+            parts = [task.result() for task in cell_tasks]
+            cells.append(parts[0] if len(parts) == 1 else merge_cells(enc_path, parts, cache_folder, options, self.enc_updates.get(enc_path)))
+        return cells
+
+    def remove_duplicates(self, bands):
+        """
+        Drop features repeated across overlapping cells, or split across records of one cell
+        - Features are matched on their FOID, the copy from the highest usage band cell is kept
+        :param dict[str[numpy.ndarray]] bands: Usage band of every feature by geometry type, MultiPoint for soundings
+        :returns dict[str[numpy.ndarray]]: Usage bands of the remaining features
+        """
+
+        removed = 0
+        for geom_type in bands.keys():
+            store = self.get_band_store(geom_type)
+            keys, valid = get_foid_keys(store)
+            if geom_type == 'Point' and 'DEPTH' in store.columns:
+                keys = get_sounding_keys(store, keys)
+            kept = get_duplicate_mask(keys, valid, bands[geom_type])
+            self.take_band_store(geom_type, kept)
+            bands[geom_type] = bands[geom_type][kept]
+            removed += int((~kept).sum())
+        arcpy.AddMessage(f' - Removed {removed} duplicate ENC features')
+        return bands
 
     def save_feature_layers(self) -> None:
         """Write out passed and failed layers to output folder"""
@@ -220,108 +672,164 @@ class ENCReaderEngine(Engine):
             arcpy.management.CopyFeatures(self.geometries[feature_type]['layers']['passed'], str(OUTPUTS / f'{feature_type}-passed.shp'))
             arcpy.management.CopyFeatures(self.geometries[feature_type]['layers']['failed'], str(OUTPUTS / f'{feature_type}-failed.shp'))
 
-    def set_driver(self) -> None:
-        """Set the S57 driver for GDAL"""
-
-        self.driver = ogr.GetDriverByName('S57')
-
     def set_env_variables(self) -> None:
-        """Set multipoint on ENV variable"""
+        """Set S-57 driver options on ENV variable from the selected profile"""
 
-        os.environ["OGR_S57_OPTIONS"] = "SPLIT_MULTIPOINT=ON"
+        profile = self.get_option('enc_s57_profile', list(S57_PROFILES.keys())[0])
+        os.environ["OGR_S57_OPTIONS"] = S57_PROFILES.get(profile, profile)
+        arcpy.AddMessage(f' - S-57 driver options: {os.environ["OGR_S57_OPTIONS"]}')
 
-    def set_failed_invreq(self, feature_type, objl_lookup, invreq_options) -> None:
+    def set_failed_invreq(self, feature_type, features, rows, objl_lookup, invreq_options, invreq) -> None:
         """
-        Isolate logic for setting failed layer 'invreq' column
+        Isolate logic for setting failed feature 'invreq' values
         :param str feature_type: Point, LineString, or Polygon
+        :param FeatureStore features: Columnar features of that geometry type
+        :param numpy.ndarray rows: Indexes of the failed features
         :param dict[str[str|int]]: YAML values from invreq_look.yaml
         :param dict[int|str] invreq_options: YAML invreq string values to fill column
+        :param list[str] invreq: invreq value of every feature, updated in place
         """
 
-        with arcpy.da.UpdateCursor(self.geometries[feature_type]['layers']['failed'], ['OBJL_NAME', 'invreq']) as updateCursor:
-            for row in updateCursor:
-                objl_found = row[0] in objl_lookup.keys()
-                if objl_found:
-                    if row[0] == 'SBDARE':
-                        if feature_type != 'Point':
-                            row[1] = invreq_options.get(14)
-                    else:
-                        row[1] = invreq_options.get(14)
-                    updateCursor.updateRow(row)
+        objl_names = features.get_values('OBJL_NAME').tolist()
+        for row in rows.tolist():
+            objl_found = objl_names[row] in objl_lookup.keys()
+            if objl_found:
+                if objl_names[row] == 'SBDARE':
+                    if feature_type != 'Point':
+                        invreq[row] = invreq_options.get(14)
+                else:
+                    invreq[row] = invreq_options.get(14)
 
-    def set_passed_invreq(self, feature_type, objl_lookup, invreq_options):
+    def set_passed_invreq(self, feature_type, features, rows, objl_lookup, invreq_options, invreq):
         """
-        Isolate logic for setting passed layer 'invreq' column
+        Isolate logic for setting passed feature 'invreq' values
         :param str feature_type: Point, LineString, or Polygon
+        :param FeatureStore features: Columnar features of that geometry type
+        :param numpy.ndarray rows: Indexes of the passed features
         :param dict[str[str|int]]: YAML values from invreq_look.yaml
         :param dict[int|str] invreq_options: YAML invreq string values to fill column
+        :param list[str] invreq: invreq value of every feature, updated in place
         """
 
-        with arcpy.da.UpdateCursor(self.geometries[feature_type]['layers']['passed'], ["SHAPE@", "*"]) as updateCursor:
-            # Have to use * because some columns(CATOBS, etc) may be missing in point, line, or polygon feature layers
-            indx = {
-                'OBJL_NAME': updateCursor.fields.index('OBJL_NAME'),
-                'CATOBS': updateCursor.fields.index('CATOBS') if 'CATOBS' in updateCursor.fields else False,
-                'CATMOR': updateCursor.fields.index('CATMOR') if 'CATMOR' in updateCursor.fields else False,
-                'CONDTN': updateCursor.fields.index('CONDTN') if 'CONDTN' in updateCursor.fields else False,
-                'WATLEV': updateCursor.fields.index('WATLEV') if 'WATLEV' in updateCursor.fields else False,
-                'invreq': updateCursor.fields.index('invreq'),
-                'SHAPE@': updateCursor.fields.index('SHAPE@')
-            }
-            for row in updateCursor:
-                if row[indx['OBJL_NAME']] == 'LNDARE':
-                    if feature_type == 'Polygon':
-                        area = row[indx['SHAPE@']].projectAs(arcpy.SpatialReference(102008)).area  # project to NA Albers Equal Area
-                        if area < 3775:  # FME polygon size check 
-                            invreq = objl_lookup.get(row[indx['OBJL_NAME']], objl_lookup['OTHER'])['invreq']
-                            row[indx['invreq']] = invreq_options.get(invreq, '')
-                # CATMOR column needed for MORFAC
-                elif row[indx['OBJL_NAME']] == 'MORFAC':
-                    if indx['CATMOR']:
-                        catmor = row[indx["CATMOR"]]
-                        if catmor == 1:
-                            row[indx['invreq']] = invreq_options.get(10, '')
-                        elif catmor in [2, 3, 4, 5, 6, 7]:
-                            row[indx['invreq']] = invreq_options.get(1, '')
-                # CATOBS column needed for OBSTRN
-                elif row[indx['OBJL_NAME']] == 'OBSTRN':
-                    if indx['CATOBS']:
-                        catobs = row[indx["CATOBS"]]
-                        if catobs == 2:
-                            row[indx['invreq']] = invreq_options.get(12, '')
-                        elif catobs == 5:
-                            row[indx['invreq']] = invreq_options.get(8, '')
-                        elif catobs in [None, 1, 3, 4, 6, 7, 8, 9, 10]:
-                            row[indx['invreq']] = invreq_options.get(5, '')
-                elif row[indx['OBJL_NAME']] == 'SBDARE':
-                    row[indx['invreq']] = invreq_options.get(13, '')
-                # CONDTN column needed for SLCONS
-                elif row[indx['OBJL_NAME']] == 'SLCONS':
-                    if indx['CONDTN']:
-                        condtn = row[indx["CONDTN"]]
-                        if condtn in [1, 3, 4, 5]:
-                            row[indx['invreq']] = invreq_options.get(1, '')
-                        elif condtn == 2:
-                            row[indx['invreq']] = invreq_options.get(5, '')
-                # WATLEV column needed for UWTROC
-                elif row[indx['OBJL_NAME']] == 'UWTROC':
-                    if indx['WATLEV']:
-                        condtn = row[indx["WATLEV"]]
-                        if condtn in [1, 2, 4, 5, 6, 7]:
-                            row[indx['invreq']] = invreq_options.get(5, '')
-                        elif condtn == 3:
-                            row[indx['invreq']] = invreq_options.get(7, '')
-                else:
-                    # Set to OTHER value if missing
-                    invreq = objl_lookup.get(row[indx['OBJL_NAME']], objl_lookup['OTHER'])['invreq']
-                    row[indx['invreq']] = invreq_options.get(invreq, '')
-                updateCursor.updateRow(row)
+        # Some columns(CATOBS, etc) may be missing for point, line, or polygon features
+        # Attributes are compared as the text the layers held before the columnar store, ie: str(None) is 'None'
+        columns = {field: [str(value) for value in features.get_values(field).tolist()] if field in features.columns else None
+                   for field in ['CATOBS', 'CATMOR', 'CONDTN', 'WATLEV']}
+        columns['OBJL_NAME'] = features.get_values('OBJL_NAME').tolist()
+        for row in rows.tolist():
+            objl_name = columns['OBJL_NAME'][row]
+            if objl_name == 'LNDARE':
+                if feature_type == 'Polygon':
+                    area = self.get_geometry(features, row).projectAs(arcpy.SpatialReference(102008)).area  # project to NA Albers Equal Area
+                    if area < 3775:  # FME polygon size check
+                        invreq_option = objl_lookup.get(objl_name, objl_lookup['OTHER'])['invreq']
+                        invreq[row] = invreq_options.get(invreq_option, '')
+            # CATMOR column needed for MORFAC
+            elif objl_name == 'MORFAC':
+                if columns['CATMOR']:
+                    catmor = columns['CATMOR'][row]
+                    if catmor == 1:
+                        invreq[row] = invreq_options.get(10, '')
+                    elif catmor in [2, 3, 4, 5, 6, 7]:
+                        invreq[row] = invreq_options.get(1, '')
+            # CATOBS column needed for OBSTRN
+            elif objl_name == 'OBSTRN':
+                if columns['CATOBS']:
+                    catobs = columns['CATOBS'][row]
+                    if catobs == 2:
+                        invreq[row] = invreq_options.get(12, '')
+                    elif catobs == 5:
+                        invreq[row] = invreq_options.get(8, '')
+                    elif catobs in [None, 1, 3, 4, 6, 7, 8, 9, 10]:
+                        invreq[row] = invreq_options.get(5, '')
+            elif objl_name == 'SBDARE':
+                invreq[row] = invreq_options.get(13, '')
+            # CONDTN column needed for SLCONS
+            elif objl_name == 'SLCONS':
+                if columns['CONDTN']:
+                    condtn = columns['CONDTN'][row]
+                    if condtn in [1, 3, 4, 5]:
+                        invreq[row] = invreq_options.get(1, '')
+                    elif condtn == 2:
+                        invreq[row] = invreq_options.get(5, '')
+            # WATLEV column needed for UWTROC
+            elif objl_name == 'UWTROC':
+                if columns['WATLEV']:
+                    watlev = columns['WATLEV'][row]
+                    if watlev in [1, 2, 4, 5, 6, 7]:
+                        invreq[row] = invreq_options.get(5, '')
+                    elif watlev == 3:
+                        invreq[row] = invreq_options.get(7, '')
+            else:
+                # Set to OTHER value if missing
+                invreq_option = objl_lookup.get(objl_name, objl_lookup['OTHER'])['invreq']
+                invreq[row] = invreq_options.get(invreq_option, '')
 
     def start(self):
-        self.set_driver()
         self.set_env_variables()
         self.get_enc_geometries()
         self.perform_spatial_filter()
+        if self.get_option('enc_clip_to_sheets', False):
+            self.clip_to_sheets()
+        if self.get_option('enc_sheet_join', False):
+            self.join_sheets()
         self.print_feature_total()
         self.add_columns()
+        self.write_feature_layers()
         # self.save_feature_layers()
+
+    def take_band_store(self, geom_type, kept) -> None:
+        """
+        Keep a subset of the features of a store that usage bands are tracked for
+        :param str geom_type: Point, LineString, Polygon, or MultiPoint for SOUNDG parents
+        :param numpy.ndarray kept: True for features to keep
+        """
+
+        if geom_type == 'MultiPoint':
+            self.geometries['Point']['soundings'] = self.geometries['Point']['soundings'].take_parents(kept)
+        else:
+            self.geometries[geom_type]['features'] = self.geometries[geom_type]['features'].take(kept)
+
+    def write_feature_layer(self, feature_type, value, features, fields):
+        """
+        Write passed or failed features to an in memory layer
+        :param str feature_type: Point, LineString, or Polygon
+        :param str value: passed or failed
+        :param FeatureStore features: Columnar features of that geometry type
+        :param list[str] fields: Field names for the layer
+        :returns arcpy.FeatureClass: In memory layer
+        """
+
+        layer = arcpy.management.CreateFeatureclass('memory', f'{LAYER_NAMES[feature_type]}_{value}', ESRI_TYPES[feature_type],
+                                                    spatial_reference=arcpy.SpatialReference(4326))
+        if fields:
+            arcpy.management.AddFields(layer, [[field, 'TEXT'] for field in fields])
+
+        # One cursor over the union schema, missing attributes are written as None
+        shape_field = 'SHAPE@XY' if feature_type == 'Point' else 'SHAPE@WKB'
+        with arcpy.da.InsertCursor(layer, [shape_field] + fields) as cursor:
+            selected = features.passed if value == 'passed' else ~features.passed
+            for row, attributes in enumerate(features.rows(fields)):
+                if selected[row]:
+                    cursor.insertRow([self.get_shape(features, row)] + [None if attribute is None else str(attribute) for attribute in attributes])
+
+            if feature_type == 'Point':
+                soundings = self.geometries['Point']['soundings']
+                selected = soundings.passed if value == 'passed' else ~soundings.passed
+                x, y = soundings.x.tolist(), soundings.y.tolist()
+                for row, attributes in enumerate(soundings.rows(fields)):
+                    if selected[row]:
+                        cursor.insertRow([(x[row], y[row])] + [None if attribute is None else str(attribute) for attribute in attributes])
+        return layer
+
+    def write_feature_layers(self) -> None:
+        """Build the passed and failed in memory layers for every geometry type"""
+
+        for feature_type in self.geometries.keys():
+            arcpy.AddMessage(f' - Writing {feature_type} layers')
+            features = self.geometries[feature_type]['features']
+            fields = self.get_all_fields(features)
+            if feature_type == 'Point':
+                fields = list(dict.fromkeys(fields + self.get_all_fields(self.geometries['Point']['soundings'])))
+            for value in ['passed', 'failed']:
+                self.geometries[feature_type]['layers'][value] = self.write_feature_layer(feature_type, value, features, fields)
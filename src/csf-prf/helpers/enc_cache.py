@@ -0,0 +1,86 @@
+import os
+import hashlib
+import pathlib
+import pickle
+
+
+CACHE_VERSION = 6  # Bump when the decoded cell layout changes
+
+
+class ENCCache:
+    """
+    Folder of decoded ENC cells
+    - Cells are keyed by a hash of the file bytes, the OGR_S57_OPTIONS in effect and the reader options
+    """
+
+    def __init__(self, folder, options=None) -> None:
+        self.folder = pathlib.Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.options = repr(sorted((options or {}).items()))
+
+    def get_key(self, enc_path, previous_key='') -> str:
+        """
+        Build the cache key for an ENC file
+        :param str enc_path: Path to an ENC base or update file on disk
+        :param str previous_key: Key of the cell state an update file is applied to
+        :returns str: Hex digest of the file contents and S-57 options
+        """
+
+        digest = hashlib.sha256()
+        digest.update(f"{CACHE_VERSION};{os.environ.get('OGR_S57_OPTIONS', '')};{self.options};{previous_key};".encode())
+        with open(enc_path, 'rb') as enc_file:
+            for chunk in iter(lambda: enc_file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_keys(self, enc_path, update_paths) -> list:
+        """
+        Build the chain of cache keys for a base cell and each of its updates
+        :param str enc_path: Path to a .000 base cell
+        :param list[str] update_paths: Update files in update number order
+        :returns list[str]: Keys for the base cell and the cell after each update
+        """
+
+        keys = [self.get_key(enc_path)]
+        for update_path in update_paths:
+            keys.append(self.get_key(update_path, keys[-1]))
+        return keys
+
+    def get_path(self, key) -> pathlib.Path:
+        """
+        Location of a cached cell on disk
+        :param str key: Cache key from get_key()
+        :returns pathlib.Path: Cache file path
+        """
+
+        return self.folder / f'{key}.pickle'
+
+    def load(self, key):
+        """
+        Load a decoded cell from the cache
+        :param str key: Cache key from get_key()
+        :returns dict|None: Decoded cell or None if it is not cached
+        """
+
+        path = self.get_path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (EOFError, ValueError, OverflowError, AttributeError, ImportError, pickle.UnpicklingError):
+            return None  # Partially written or corrupt, decode again
+
+    def save(self, key, cell) -> None:
+        """
+        Write a decoded cell to the cache
+        - Written to a temporary file first so parallel workers never see partial files
+        :param str key: Cache key from get_key()
+        :param dict cell: Decoded cell
+        """
+
+        path = self.get_path(key)
+        temp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_path, 'wb') as cache_file:
+            pickle.dump(cell, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
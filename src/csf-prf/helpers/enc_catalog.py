@@ -0,0 +1,50 @@
+import pathlib
+
+from helpers.enc_updates import get_base_path
+from helpers.iso8211 import ISO8211File
+
+
+def find_catalog(exchange_set):
+    """
+    Find the CATALOG.031 of an ENC exchange set
+    :param str exchange_set: Exchange set root folder, or its ENC_ROOT folder
+    :returns pathlib.Path|None: Catalog file path or None when there is no catalog
+    """
+
+    root = pathlib.Path(exchange_set)
+    for folder in [root, root / 'ENC_ROOT']:
+        for path in folder.glob('*'):
+            if path.name.upper() == 'CATALOG.031' and path.is_file():
+                return path
+    return next((path for path in root.rglob('*') if path.name.upper() == 'CATALOG.031'), None)
+
+
+def read_catalog(catalog_path):
+    """
+    Read the cell entries of a CATALOG.031 without opening any cell
+    - Entries are grouped by cell name, exchange sets keep each update in its own folder, ie: US5BOSBE/24/1/US5BOSBE.001
+    - The base cell entry holds the bounds, update entries only add to the cell's update list
+    :param str catalog_path: Path to CATALOG.031
+    :returns list[dict]: Base cell path, WGS84 bounds or None, and update file paths, in catalog order
+    """
+
+    folder = pathlib.Path(catalog_path).parent
+    cells = {}
+    with ISO8211File(str(catalog_path)) as catalog:
+        for record in catalog:
+            catd = record.get('CATD')
+            if not catd or catd.get('IMPL') != 'BIN':
+                continue  # Catalog itself, README and other non ENC files
+            path = str(folder / catd['FILE'].replace('\\', '/'))
+            # Base path from the first entry until the .000 entry is read, updates may be listed before it
+            cell = cells.setdefault(pathlib.Path(path).stem, {'path': get_base_path(path), 'bounds': None, 'updates': []})
+            if path != get_base_path(path):
+                cell['updates'].append(path)
+                continue
+            cell['path'] = path
+            bounds = [catd.get(label) for label in ['WLON', 'SLAT', 'ELON', 'NLAT']]
+            if None not in bounds:
+                cell['bounds'] = tuple(bounds)
+    for cell in cells.values():
+        cell['updates'].sort(key=lambda update: int(pathlib.Path(update).suffix[1:]))
+    return list(cells.values())
@@ -0,0 +1,59 @@
+import numpy as np
+
+from helpers.feature_store import FeatureStore
+from helpers.spatial import check_shapely, get_geometries, shapely
+from helpers.spatial_tiles import get_geometry_sizes, get_tile_batches
+
+
+PART_TYPES = {'LineString': 1, 'Polygon': 3}  # shapely type ids kept from the overlay, other dimensions are dropped
+
+
+def clip_store(store, footprint, memory_limit=0):
+    """
+    Trim passed lines or polygons that cross the edge of the sheets footprint
+    - Features inside the footprint by bbox or covered by its prepared geometry are not overlaid
+    - Each multipart result becomes one feature per part, all with the attributes of the whole feature
+    - Features whose overlay leaves nothing of their own dimension, ie: a polygon only touching a sheet, stay whole
+    :param FeatureStore store: LineString or Polygon features with passed set
+    :param SheetsFootprint footprint: Sheets footprint
+    :param int memory_limit: Bytes of geometry per overlay batch, 0 for a single batch
+    :returns (FeatureStore, int): Store with a 'clipped' column of 1 for trimmed parts, and the number of features trimmed
+    """
+
+    check_shapely('Clipping to sheets')
+    rows = np.flatnonzero(store.passed)
+    _, _, edge = footprint.classify(store.bounds[rows])
+    rows = rows[edge]
+    part_rows = []
+    parts = []
+    for batch in get_tile_batches(store.bounds[rows], get_geometry_sizes(store, rows), memory_limit) if len(rows) else []:
+        batch_rows = rows[batch]
+        geometries = get_geometries(store, batch_rows)
+        crossing = ~footprint.covers(geometries)
+        batch_parts, index = shapely.get_parts(shapely.intersection(geometries[crossing], footprint.union), return_index=True)
+        kept = shapely.get_type_id(batch_parts) == PART_TYPES[store.geom_type]
+        part_rows.append(batch_rows[crossing][index[kept]])
+        parts.append(batch_parts[kept])
+
+    clipped = np.zeros(len(store), dtype=bool)
+    if parts:
+        # Back to store order, batches follow tile order
+        part_rows = np.concatenate(part_rows)
+        order = np.argsort(part_rows, kind='stable')
+        part_rows, parts = part_rows[order], np.concatenate(parts)[order]
+        clipped[part_rows] = True
+    kept = np.flatnonzero(~clipped)
+    kept_store = store.take(kept)
+    kept_store.set_column('clipped', [None] * len(kept))
+    if not clipped.any():
+        kept_store.passed = store.passed[kept]
+        return kept_store, 0
+
+    part_store = store.take(part_rows)
+    wkb = np.empty(len(parts), dtype=object)
+    wkb[:] = list(shapely.to_wkb(parts, output_dimension=2, byte_order=1))
+    part_store = FeatureStore.from_wkb(store.geom_type, wkb, shapely.bounds(parts), part_store.columns)
+    part_store.set_column('clipped', [1] * len(parts))
+    result = FeatureStore.concat([kept_store, part_store])
+    result.passed = np.concatenate([store.passed[kept], np.ones(len(parts), dtype=bool)])
+    return result, int(clipped.sum())
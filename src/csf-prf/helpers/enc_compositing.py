@@ -0,0 +1,87 @@
+import pathlib
+
+import numpy as np
+
+from helpers.spatial import check_shapely, shapely
+
+
+def get_covered_mask(geometries, bands, coverages):
+    """
+    Find features of lower usage band cells that lie inside the coverage of a higher band cell
+    - Features crossing the edge of higher band coverage are kept whole
+    :param numpy.ndarray geometries: shapely geometry of each feature
+    :param numpy.ndarray bands: Usage band of the cell each feature came from
+    :param dict[int[numpy.ndarray]] coverages: shapely M_COVR polygons by usage band
+    :returns numpy.ndarray: True for features covered by a higher band
+    """
+
+    check_shapely('Usage band compositing')
+    covered = np.zeros(len(geometries), dtype=bool)
+    higher = None
+    for band in sorted(set(coverages.keys()).union(np.unique(bands).tolist()), reverse=True):
+        rows = np.flatnonzero(bands == band)
+        if higher is not None and len(rows):
+            covered[rows] = shapely.within(geometries[rows], higher)
+        if len(coverages.get(band, [])):
+            higher = shapely.union_all(list(coverages[band]) + ([higher] if higher is not None else []))
+            shapely.prepare(higher)
+    return covered
+
+
+def get_duplicate_mask(keys, valid, bands):
+    """
+    Find the copies of features repeated across overlapping cells or split across records
+    - The copy from the highest usage band (largest scale) cell is kept, ties keep the first copy
+    :param numpy.ndarray keys: Packed FOID of each feature from get_foid_keys(), one row of key parts per feature if 2D
+    :param numpy.ndarray valid: False for features without a complete FOID, which are always kept
+    :param numpy.ndarray bands: Usage band of the cell each feature came from
+    :returns numpy.ndarray: True for features to keep
+    """
+
+    kept = ~valid
+    rows = np.flatnonzero(valid)
+    # Highest band first, then input order, so the first row of each key is the one to keep
+    order = rows[np.lexsort((rows, -bands[rows]))]
+    _, first = np.unique(keys[order], return_index=True, axis=0)
+    kept[order[first]] = True
+    return kept
+
+
+def get_foid_keys(store):
+    """
+    Pack the AGEN, FIDN and FIDS of every feature into one integer, the same identity as LNAM
+    :param FeatureStore store: Columnar features
+    :returns (numpy.ndarray, numpy.ndarray): uint64 keys and a mask of features with a complete FOID
+    """
+
+    values = [store.get_values(field) for field in ['AGEN', 'FIDN', 'FIDS']]
+    valid = np.ones(len(store), dtype=bool)
+    for field_values in values:
+        valid &= np.not_equal(field_values, None)
+    agen, fidn, fids = [np.where(valid, field_values, 0).astype(np.uint64) for field_values in values]
+    return (agen << np.uint64(48)) | (fidn << np.uint64(16)) | fids, valid
+
+
+def get_sounding_keys(store, keys):
+    """
+    Extend the FOID keys of split soundings with their position
+    - With SPLIT_MULTIPOINT=ON every sounding is a Point sharing the FOID of its SOUNDG feature
+    :param FeatureStore store: Point features, split soundings have a DEPTH value
+    :param numpy.ndarray keys: Packed FOID of each feature from get_foid_keys()
+    :returns numpy.ndarray: FOID, X and Y key parts per feature, X and Y are 0 for other points
+    """
+
+    split = np.not_equal(store.get_values('DEPTH'), None)
+    positions = np.where(split[:, None], store.coords, 0.0).view(np.uint64)
+    return np.column_stack([keys, positions])
+
+
+def get_usage_band(enc_path) -> int:
+    """
+    Get the usage band of a cell from its name, ie: 5 for US5BOSBE (harbor)
+    :param str enc_path: Path to an ENC cell
+    :returns int: Usage band 1 to 6, 0 when the name does not follow the S-57 convention
+    """
+
+    name = pathlib.Path(enc_path).stem
+    return int(name[2]) if len(name) > 2 and name[2].isdigit() else 0
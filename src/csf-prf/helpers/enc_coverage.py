@@ -0,0 +1,68 @@
+import numpy as np
+
+from helpers.enc_updates import get_update_files
+from helpers.iso8211 import ISO8211File
+
+
+COORDINATE_FIELDS = {'SG2D': 2, 'SG3D': 3}  # YCOO, XCOO and VE3D for soundings
+
+
+def extents_intersect(extent, extents) -> bool:
+    """
+    Check an envelope against a list of envelopes
+    :param tuple[float] extent: XMin, YMin, XMax, YMax
+    :param list[tuple[float]] extents: Envelopes to test against, ie: one per sheet
+    :returns bool: True if the envelope touches any of the others
+    """
+
+    xmin, ymin, xmax, ymax = extent
+    return any(xmin <= other_xmax and other_xmin <= xmax and ymin <= other_ymax and other_ymin <= ymax
+               for other_xmin, other_ymin, other_xmax, other_ymax in extents)
+
+
+def get_bounds_mask(bounds, extents):
+    """
+    Vectorized envelope test of many features against a list of envelopes
+    :param numpy.ndarray bounds: XMin, YMin, XMax, YMax of each feature
+    :param list[tuple[float]] extents: Envelopes to test against, ie: one per sheet
+    :returns numpy.ndarray: True for features whose bbox touches any envelope
+    """
+
+    mask = np.zeros(len(bounds), dtype=bool)
+    for xmin, ymin, xmax, ymax in extents:
+        mask |= (bounds[:, 0] <= xmax) & (bounds[:, 2] >= xmin) & (bounds[:, 1] <= ymax) & (bounds[:, 3] >= ymin)
+    return mask
+
+
+def get_cell_extent(enc_path, update_paths=None):
+    """
+    Get the extent of a cell without decoding any features
+    - Only the raw SG2D/SG3D coordinate fields of the base cell and its updates are read
+    - Every feature in the cell lies within this extent, so it is a safe stand in for M_COVR
+    :param str enc_path: Path to a .000 base cell
+    :param list[str] update_paths: Update files of the cell, the ones next to it if None
+    :returns tuple[float]|None: WGS84 XMin, YMin, XMax, YMax, None for a cell without coordinates
+    """
+
+    comf = None
+    minimums = []
+    maximums = []
+    update_paths = get_update_files(enc_path) if update_paths is None else list(update_paths)
+    for path in [enc_path] + update_paths:
+        with ISO8211File(path) as iso_file:
+            for record in iso_file:
+                for tag, start, length in record.entries:
+                    if tag == 'DSPM' and comf is None:
+                        comf = record.get('DSPM')['COMF']
+                    elif tag in COORDINATE_FIELDS:
+                        size = COORDINATE_FIELDS[tag]
+                        count = (length - 1) // (4 * size) * size
+                        coordinates = np.frombuffer(iso_file.data[start:start + count * 4], dtype='<i4').reshape(-1, size)[:, :2]
+                        if len(coordinates):
+                            minimums.append(coordinates.min(axis=0))
+                            maximums.append(coordinates.max(axis=0))
+    if not minimums:
+        return None
+    comf = comf or 10000000  # S-57 default coordinate multiplication factor
+    (ymin, xmin), (ymax, xmax) = np.min(minimums, axis=0) / comf, np.max(maximums, axis=0) / comf
+    return float(xmin), float(ymin), float(xmax), float(ymax)
@@ -0,0 +1,398 @@
+import os
+import sys
+import shutil
+import pathlib
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from osgeo import ogr
+from helpers.enc_cache import ENCCache
+from helpers.enc_updates import get_update_changes, get_update_files, read_links
+from helpers.feature_store import FeatureStore, SoundingsTable
+from helpers.s57_catalog import get_catalog
+
+
+GEOMETRY_TYPES = {
+    ogr.wkbPoint: 'Point',
+    ogr.wkbLineString: 'LineString',
+    ogr.wkbPolygon: 'Polygon',
+    ogr.wkbMultiPoint: 'MultiPoint'
+}
+
+
+def apply_enc_updates(enc_path, cell, applied_paths, update_paths, options=None) -> None:
+    """
+    Bring a decoded cell up to date with new update files
+    - Only features touched by the updates are decoded again, the rest of the cell is reused
+    :param str enc_path: Path to a .000 base cell
+    :param dict cell: Decoded cell at the last applied update, updated in place
+    :param list[str] applied_paths: Update files already included in the decoded cell
+    :param list[str] update_paths: New update files in update number order
+    :param dict options: Reader options, see get_layers()
+    """
+
+    if cell.get('links') is None:
+        cell['links'] = read_links(enc_path)
+        for applied_path in applied_paths:
+            get_update_changes(applied_path, cell['links'])
+
+    deleted = set()
+    changed = {}
+    for update_path in update_paths:
+        update_deleted, update_changed = get_update_changes(update_path, cell['links'])
+        deleted.difference_update(update_changed)
+        deleted.update(update_deleted)
+        for foid in update_deleted:
+            changed.pop(foid, None)
+        changed.update(update_changed)
+
+    removed = deleted.union(changed)
+    if not removed:
+        return
+    features = {'Point': [], 'LineString': [], 'Polygon': [], 'MultiPoint': []}
+    unknown = set(cell['unknown'])
+    with stage_cell(enc_path, applied_paths + update_paths) as ogr_path:
+        enc_file = open_file(ogr_path)
+        cell['coverage'] = get_coverage(enc_file)
+        for geom_type, feature in get_changed_features(enc_file, changed, options):
+            if feature is None:
+                unknown.add(geom_type)
+            else:
+                features[geom_type].append(feature)
+        enc_file = None  # Close before a staged copy is removed
+    cell['unknown'] = sorted(unknown)
+    soundings = features.pop('MultiPoint')
+    for geom_type, new_features in features.items():
+        store = cell[geom_type]
+        kept = [foid not in removed for foid in get_store_foids(store)]
+        cell[geom_type] = FeatureStore.concat([store.take(np.array(kept, dtype=bool)),
+                                               FeatureStore.from_features(geom_type, new_features)])
+    kept = [foid not in removed for foid in get_store_foids(cell['MultiPoint'].parents)]
+    cell['MultiPoint'] = SoundingsTable.concat([cell['MultiPoint'].take_parents(np.array(kept, dtype=bool)),
+                                                SoundingsTable.from_features(soundings)])
+
+
+def decode_enc_file(enc_path, options=None, layers=None, exclude=(), update_paths=None):
+    """
+    Read all features from a single ENC file
+    - Kept free of arcpy so it can run as a worker process task
+    - Several tasks can decode layer groups of one cell with their own OGR handle, see merge_cells()
+    :param str enc_path: Path to an ENC file on disk
+    :param dict options: Reader options, see get_layers()
+    :param list[str] layers: Only read these layers, coverage is then left to the task reading the rest
+    :param list[str] exclude: Layers read by other tasks
+    :param list[str] update_paths: Update files to apply, the ones next to the cell if None
+    :returns dict[str[FeatureStore|SoundingsTable|list]]: Feature store by geometry type, soundings and unique names of unknown geometry types
+    """
+
+    features = {'Point': [], 'LineString': [], 'Polygon': [], 'MultiPoint': []}
+    unknown = set()
+    with stage_cell(enc_path, update_paths) as ogr_path:
+        enc_file = open_file(ogr_path)
+        for geom_type, feature in get_enc_features(enc_file, options, layers, exclude):
+            if feature is None:
+                unknown.add(geom_type)
+            else:
+                features[geom_type].append(feature)
+        coverage = get_coverage(enc_file) if layers is None else []
+        enc_file = None  # Close before a staged copy is removed
+    cell = {geom_type: FeatureStore.from_features(geom_type, features[geom_type]) for geom_type in ['Point', 'LineString', 'Polygon']}
+    cell['MultiPoint'] = SoundingsTable.from_features(features['MultiPoint'])
+    cell['coverage'] = coverage
+    cell['unknown'] = sorted(unknown)
+    return cell
+
+
+def get_changed_features(enc_file, changed, options=None):
+    """
+    Decode only the listed features from a cell with all of its updates applied
+    :param GDAL.File enc_file: Opened .000 base cell
+    :param dict[tuple[int]] changed: OBJL of each changed feature by FOID
+    :param dict options: Reader options, see get_layers()
+    :returns generator[(str, dict)]: Geometry type and GeoJSON style feature
+    """
+
+    if not changed:
+        return
+    acronyms = set(get_catalog().get_acronyms(np.array(list(changed.values()), dtype=np.int64)).tolist())
+    read_all_layers = '' in acronyms  # OBJL missing from the lookup, check every layer
+    for layer in get_layers(enc_file, options):
+        if not read_all_layers and layer.GetName() not in acronyms:
+            continue
+        for feature in layer:
+            if feature and (feature.GetField('AGEN'), feature.GetField('FIDN'), feature.GetField('FIDS')) in changed:
+                yield from get_feature_records(feature)
+
+
+def get_coverage(enc_file):
+    """
+    Read the data coverage of a cell
+    - Read even when M_COVR is in skip_layers, and never spatially filtered
+    :param GDAL.File enc_file: Opened ENC file
+    :returns list[list[numpy.ndarray]]: Rings of each M_COVR polygon with CATCOV 1, coverage available
+    """
+
+    layer = enc_file.GetLayerByName('M_COVR')
+    if layer is None:
+        return []
+    layer.SetSpatialFilter(None)
+    layer.ResetReading()
+    polygons = []
+    for feature in layer:
+        geometry = feature.GetGeometryRef() if feature else None
+        if geometry is None or feature.GetField('CATCOV') != 1:
+            continue
+        geometry.FlattenTo2D()
+        polygons.append([np.array(ring.GetPoints() or [], dtype=np.float64).reshape(-1, 2) for ring in geometry])
+    return polygons
+
+
+def get_enc_features(enc_file, options=None, layers=None, exclude=()):
+    """
+    Lazily read every feature from an open ENC file
+    - Values come straight from ogr.Feature/ogr.Geometry, no JSON round trip
+    :param GDAL.File enc_file: Opened ENC file
+    :param dict options: Reader options, see get_layers()
+    :param list[str] layers: Only read these layers, all layers if None
+    :param list[str] exclude: Layers not to read
+    :returns generator[(str, dict)]: Geometry type and GeoJSON style feature
+    """
+
+    for layer in get_layers(enc_file, options, layers, exclude):
+        for feature in layer:
+            if feature:
+                yield from get_feature_records(feature)
+
+
+def get_extents_geometry(extents):
+    """
+    Build a spatial filter geometry from envelopes
+    :param list[tuple[float]] extents: XMin, YMin, XMax, YMax of each envelope
+    :returns ogr.Geometry: MultiPolygon of envelope rectangles
+    """
+
+    geometry = ogr.Geometry(ogr.wkbMultiPolygon)
+    for xmin, ymin, xmax, ymax in extents:
+        ring = ogr.Geometry(ogr.wkbLinearRing)
+        for x, y in [(xmin, ymin), (xmin, ymax), (xmax, ymax), (xmax, ymin), (xmin, ymin)]:
+            ring.AddPoint_2D(x, y)
+        polygon = ogr.Geometry(ogr.wkbPolygon)
+        polygon.AddGeometry(ring)
+        geometry.AddGeometry(polygon)
+    return geometry
+
+
+def get_feature_records(feature):
+    """
+    Convert a single OGR feature to GeoJSON style records
+    - LineString and Polygon geometry is kept as 2D WKB with its bbox, decoded later by FeatureStore
+    - MultiPoint coordinates are an XYZ numpy array of all points
+    - Unknown geometry types are yielded by name with no feature
+    :param ogr.Feature feature: Feature from an ENC layer
+    :returns generator[(str, dict)]: Geometry type and GeoJSON style feature
+    """
+
+    geometry = feature.GetGeometryRef()
+    if geometry is None:
+        return
+    geom_type = GEOMETRY_TYPES.get(ogr.GT_Flatten(geometry.GetGeometryType()))
+    properties = feature.items()
+
+    if geom_type == 'Point':
+        coordinates = list(geometry.GetPoint_2D(0))
+        yield geom_type, {'type': 'Feature', 'geometry': {'type': geom_type, 'coordinates': coordinates}, 'properties': properties}
+    elif geom_type in ['LineString', 'Polygon']:
+        geometry.FlattenTo2D()
+        xmin, xmax, ymin, ymax = geometry.GetEnvelope()
+        wkb = bytes(geometry.ExportToWkb(ogr.wkbNDR))
+        yield geom_type, {'type': 'Feature', 'geometry': {'type': geom_type, 'wkb': wkb, 'bbox': [xmin, ymin, xmax, ymax]}, 'properties': properties}
+    elif geom_type == 'MultiPoint':
+        coordinates = get_multipoint_coordinates(geometry)
+        yield geom_type, {'type': 'Feature', 'geometry': {'type': geom_type, 'coordinates': coordinates}, 'properties': properties}
+    else:
+        yield geometry.GetGeometryName(), None
+
+
+def get_layers(enc_file, options=None, layers=None, exclude=()):
+    """
+    Get the layers of an open ENC file that are worth reading
+    - skip_layers: object class acronyms, ie: $TEXTS or M_QUAL, whose layers are never read
+    - extents: WGS84 envelopes used as an OGR spatial filter, features outside all of them are never decoded
+    :param GDAL.File enc_file: Opened ENC file
+    :param dict options: Reader options
+    :param list[str] layers: Only read these layers, all layers if None
+    :param list[str] exclude: Layers not to read, ie: read by another task
+    :returns generator[ogr.Layer]: Layers to read features from
+    """
+
+    options = options or {}
+    skip_layers = set(options.get('skip_layers', [])).union(exclude)
+    spatial_filter = get_extents_geometry(options['extents']) if options.get('extents') else None
+    for layer in enc_file:
+        if layer.GetName() in skip_layers or (layers is not None and layer.GetName() not in layers):
+            continue
+        if spatial_filter is not None:
+            layer.SetSpatialFilter(spatial_filter)
+        yield layer
+
+
+def get_multipoint_coordinates(geometry):
+    """
+    Decode every point of a MultiPoint, ie: SOUNDG, in one step from its WKB
+    :param ogr.Geometry geometry: MultiPoint geometry
+    :returns numpy.ndarray: X, Y, Z array with one row per point, Z is NaN for 2D geometry
+    """
+
+    axes = ['x', 'y', 'z'][:geometry.GetCoordinateDimension()]
+    # Each point is byte order, type and the coordinates, following a 9 byte MultiPoint header
+    point_type = np.dtype([('order', 'u1'), ('type', '<u4')] + [(axis, '<f8') for axis in axes])
+    points = np.frombuffer(geometry.ExportToWkb(ogr.wkbNDR), dtype=point_type, offset=9)
+    coordinates = np.full((len(points), 3), np.nan)
+    for column, axis in enumerate(axes):
+        coordinates[:, column] = points[axis]
+    return coordinates
+
+
+def get_process_pool(workers):
+    """
+    Build a process pool for decoding ENC files
+    - ArcGIS Pro runs tools inside ArcGISPro.exe, so workers must be pointed at python.exe
+    :param int workers: Number of worker processes
+    :returns ProcessPoolExecutor: Pool to map decoding tasks over
+    """
+
+    python_exe = os.path.join(sys.exec_prefix, 'python.exe')
+    if os.path.exists(python_exe):
+        multiprocessing.set_executable(python_exe)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def get_store_foids(store):
+    """
+    Get the feature object identifier of every feature in a store
+    :param FeatureStore store: Decoded features of one geometry type
+    :returns zip[tuple[int]]: AGEN, FIDN, FIDS per feature
+    """
+
+    return zip(*[store.get_values(field).tolist() for field in ['AGEN', 'FIDN', 'FIDS']])
+
+
+def is_enc_cached(enc_path, cache_folder, options=None, update_paths=None) -> bool:
+    """
+    Check for a cached cell at any point of its update chain
+    - A cell cached before its newest updates only needs those updates applied, see read_enc_file()
+    :param str enc_path: Path to a .000 base cell
+    :param str cache_folder: Optional folder of cached cells
+    :param dict options: Reader options, see get_layers()
+    :param list[str] update_paths: Update files to apply, the ones next to the cell if None
+    :returns bool: True if read_enc_file() would be a cache hit or only apply updates
+    """
+
+    if cache_folder is None:
+        return False
+    cache = ENCCache(cache_folder, options)
+    update_paths = get_update_files(enc_path) if update_paths is None else update_paths
+    return any(cache.get_path(key).exists() for key in cache.get_keys(enc_path, update_paths))
+
+
+def merge_cells(enc_path, parts, cache_folder=None, options=None, update_paths=None):
+    """
+    Merge the layer groups of one cell decoded by separate tasks
+    - The merged cell is cached the same as one from read_enc_file()
+    :param str enc_path: Path to a .000 base cell
+    :param list[dict] parts: Cells from decode_enc_file() with disjoint layers
+    :param str cache_folder: Optional folder of cached cells
+    :param dict options: Reader options, see get_layers()
+    :param list[str] update_paths: Update files the parts were decoded with, the ones next to the cell if None
+    :returns dict: Decoded cell with a 'cache' status of miss or None
+    """
+
+    cell = {geom_type: FeatureStore.concat([part[geom_type] for part in parts]) for geom_type in ['Point', 'LineString', 'Polygon']}
+    cell['MultiPoint'] = SoundingsTable.concat([part['MultiPoint'] for part in parts])
+    cell['coverage'] = [polygon for part in parts for polygon in part['coverage']]
+    cell['unknown'] = sorted(set().union(*[part['unknown'] for part in parts]))
+    if cache_folder is None:
+        cell['cache'] = None
+        return cell
+    cache = ENCCache(cache_folder, options)
+    update_paths = get_update_files(enc_path) if update_paths is None else update_paths
+    cache.save(cache.get_keys(enc_path, update_paths)[-1], cell)
+    cell['cache'] = 'miss'
+    return cell
+
+
+def open_file(enc_path):
+    """
+    Open a single input ENC file
+    :param str enc_path: Path to an ENC file on disk
+    :returns GDAL.File: GDAL File object you can loop through
+    """
+
+    driver = ogr.GetDriverByName('S57')
+    enc_file = driver.Open(enc_path, 0)
+    return enc_file
+
+
+def read_enc_file(enc_path, cache_folder=None, options=None, update_paths=None):
+    """
+    Read a single ENC file, going through the decoded cell cache when a folder is set
+    - Cached cells missing only the newest updates get just those updates applied
+    :param str enc_path: Path to a .000 base cell
+    :param str cache_folder: Optional folder of cached cells
+    :param dict options: Reader options, see get_layers()
+    :param list[str] update_paths: Update files to apply, ie: listed in an exchange set catalog, the ones next to the cell if None
+    :returns dict: Decoded cell with a 'cache' status of hit, updated, miss or None
+    """
+
+    update_paths = get_update_files(enc_path) if update_paths is None else list(update_paths)
+    if cache_folder is None:
+        cell = decode_enc_file(enc_path, options, update_paths=update_paths)
+        cell['cache'] = None
+        return cell
+
+    cache = ENCCache(cache_folder, options)
+    keys = cache.get_keys(enc_path, update_paths)
+    for applied in reversed(range(len(keys))):
+        cell = cache.load(keys[applied])
+        if cell is not None:
+            break
+
+    if cell is None:
+        cell = decode_enc_file(enc_path, options, update_paths=update_paths)  # OGR applies the update files itself
+        status = 'miss'
+    elif applied < len(update_paths):
+        apply_enc_updates(enc_path, cell, update_paths[:applied], update_paths[applied:], options)
+        status = 'updated'
+    else:
+        status = 'hit'
+    if status != 'hit':
+        cache.save(keys[-1], cell)
+    cell['cache'] = status
+    return cell
+
+
+@contextmanager
+def stage_cell(enc_path, update_paths=None):
+    """
+    Get a path OGR reads a base cell from with exactly the given updates applied
+    - OGR only applies update files stored next to the base cell
+    - Any other updates, ie: in another exchange set folder, are copied with the base cell to a temporary folder
+    :param str enc_path: Path to a .000 base cell
+    :param list[str] update_paths: Update files in update number order, the ones next to the cell if None
+    :returns generator[str]: Path to open with OGR
+    """
+
+    if update_paths is None or ([os.path.normcase(os.path.abspath(path)) for path in update_paths] ==
+                                [os.path.normcase(os.path.abspath(path)) for path in get_update_files(enc_path)]):
+        yield enc_path
+        return
+    stem = pathlib.Path(enc_path).stem
+    with tempfile.TemporaryDirectory() as folder:
+        staged_path = shutil.copyfile(enc_path, os.path.join(folder, f'{stem}.000'))
+        for update_path in update_paths:
+            shutil.copyfile(update_path, os.path.join(folder, f'{stem}{pathlib.Path(update_path).suffix}'))
+        yield staged_path
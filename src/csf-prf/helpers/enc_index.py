@@ -0,0 +1,90 @@
+import pathlib
+
+import numpy as np
+
+from collections import Counter
+from helpers.enc_updates import get_foid, get_update_files
+from helpers.iso8211 import ISO8211File, READ_ERRORS
+from helpers.s57_catalog import get_catalog
+
+
+RECORD_NAMES = {10: 'dataset', 100: 'features', 110: 'isolated_nodes', 120: 'connected_nodes', 130: 'edges', 140: 'faces'}
+
+
+def get_layer_groups(objl, parts):
+    """
+    Split the object class layers of a cell into groups of about the same number of features
+    - Largest layer first into the group with the fewest features so far
+    - One layer is never split, so a cell made mostly of SOUNDG gains little
+    :param Counter objl: Feature count by OBJL from read_cell_index()
+    :param int parts: Number of groups wanted
+    :returns list[list[str]]: Layer names of each non empty group, largest group first
+    """
+
+    layers = Counter()
+    codes = list(objl.keys())
+    for acronym, count in zip(get_catalog().get_acronyms(np.array(codes, dtype=np.int64)), objl.values()):
+        if acronym:
+            layers[acronym] += count
+    groups = [[0, []] for _ in range(max(1, min(parts, len(layers))))]
+    for acronym, count in sorted(layers.items(), key=lambda layer: (-layer[1], layer[0])):
+        group = min(groups, key=lambda group: group[0])
+        group[0] += count
+        group[1].append(acronym)
+    return [names for _, names in sorted(groups, key=lambda group: -group[0]) if names]
+
+
+def read_cell_index(enc_path):
+    """
+    Index a cell straight from its ISO 8211 records without decoding any geometry
+    - For triage only, features are still decoded by the OGR S57 driver in enc_decoder
+    :param str enc_path: Path to a .000 base cell
+    :returns dict: DSID values, record counts by record type, FOID list and OBJL histogram
+    """
+
+    index = {
+        'path': str(enc_path),
+        'name': pathlib.Path(enc_path).name,
+        'edition': None,
+        'update': None,
+        'issue_date': None,
+        'usage': None,
+        'updates': len(get_update_files(enc_path)),
+        'records': Counter(),
+        'foids': [],
+        'objl': Counter()
+    }
+    with ISO8211File(enc_path) as enc_file:
+        for record in enc_file:
+            tags = record.tags
+            if 'FRID' in tags:
+                frid = record.get('FRID')
+                index['records']['features'] += 1
+                index['objl'][frid['OBJL']] += 1
+                index['foids'].append(get_foid(record))
+            elif 'VRID' in tags:
+                vrid = record.get('VRID')
+                index['records'][RECORD_NAMES.get(vrid['RCNM'], vrid['RCNM'])] += 1
+            elif 'DSID' in tags:
+                dsid = record.get('DSID')
+                index['records']['dataset'] += 1
+                index.update({'name': dsid['DSNM'], 'edition': dsid['EDTN'], 'update': dsid['UPDN'],
+                              'issue_date': dsid['ISDT'], 'usage': dsid['INTU']})
+    return index
+
+
+def read_cell_indexes(enc_paths):
+    """
+    Index many cells, skipping any that are not valid ISO 8211 or cannot be opened
+    :param list[str] enc_paths: Paths to .000 base cells
+    :returns (list[dict], list[str]): Cell indexes, and paths that only OGR can read
+    """
+
+    indexes = []
+    unreadable = []
+    for enc_path in enc_paths:
+        try:
+            indexes.append(read_cell_index(enc_path))
+        except READ_ERRORS + (OSError,):
+            unreadable.append(enc_path)
+    return indexes, unreadable
@@ -0,0 +1,163 @@
+import pathlib
+
+from helpers.iso8211 import ISO8211File
+
+
+INSERT, DELETE, MODIFY = 1, 2, 3  # S-57 RUIN/FSUI/VPUI update instructions
+EDGE = 130
+
+
+def apply_pointer_update(pointers, control, new_pointers) -> None:
+    """
+    Apply an FSPC/VRPC pointer control to a list of spatial pointers
+    :param list[tuple] pointers: Current pointers, updated in place
+    :param dict control: Update instruction, 1 based index and pointer count
+    :param list[tuple] new_pointers: Pointers carried by the update record
+    """
+
+    instruction, index, count = control
+    index -= 1
+    if instruction == INSERT:
+        pointers[index:index] = new_pointers[:count]
+    elif instruction == DELETE:
+        del pointers[index:index + count]
+    elif instruction == MODIFY:
+        pointers[index:index + count] = new_pointers[:count]
+
+
+def get_base_path(enc_path) -> str:
+    """
+    Get the base cell for an ENC base or update file
+    :param str enc_path: Path to a .000 base or .001, .002... update file
+    :returns str: Path to the .000 base cell
+    """
+
+    path = pathlib.Path(enc_path)
+    if path.suffix[1:].isdigit():
+        return str(path.with_suffix('.000'))
+    return str(path)
+
+
+def get_foid(record):
+    """
+    Get the feature object identifier of a feature record
+    :param iso8211.Record record: S-57 feature record
+    :returns tuple[int]|None: AGEN, FIDN, FIDS
+    """
+
+    foid = record.get('FOID')
+    if foid is None:
+        return None
+    return (foid['AGEN'], foid['FIDN'], foid['FIDS'])
+
+
+def get_names(groups):
+    """
+    Convert pointer groups to (RCNM, RCID) names
+    :param list[dict] groups: FSPT or VRPT subfield groups
+    :returns list[tuple[int]]: Record names
+    """
+
+    return [(group['NAME'][0], int.from_bytes(group['NAME'][1:5], 'little')) for group in groups]
+
+
+def get_update_changes(update_path, links):
+    """
+    Read an update file and apply its pointer changes to the cell links
+    - Features referencing any updated vector record are changed too, even without a feature update
+    :param str update_path: Path to a .001, .002... update file
+    :param dict links: Cell links from read_links(), updated in place
+    :returns (set[tuple], dict[tuple[int]]): Deleted FOIDs and changed FOIDs with their OBJL
+    """
+
+    deleted = set()
+    changed = {}
+    vectors = set()
+    with ISO8211File(update_path) as update_file:
+        for record in update_file:
+            frid = record.get('FRID')
+            vrid = record.get('VRID')
+            if frid:
+                feature = links['features'].get(frid['RCID'])
+                if frid['RUIN'] == DELETE:
+                    if feature:
+                        deleted.add(feature['foid'])
+                        changed.pop(feature['foid'], None)
+                        links['features'].pop(frid['RCID'])
+                    continue
+                if frid['RUIN'] == INSERT or feature is None:
+                    feature = {'foid': get_foid(record), 'objl': frid['OBJL'], 'spatial': []}
+                    links['features'][frid['RCID']] = feature
+                spatial = get_names(sum(record.get_all('FSPT'), []))
+                control = record.get('FSPC')
+                if control:
+                    apply_pointer_update(feature['spatial'], (control['FSUI'], control['FSIX'], control['NSPT']), spatial)
+                elif spatial:
+                    feature['spatial'] = spatial
+                if feature['foid']:
+                    # A FOID deleted earlier in the file can be inserted again under a new record
+                    deleted.discard(feature['foid'])
+                    changed[feature['foid']] = feature['objl']
+            elif vrid:
+                name = (vrid['RCNM'], vrid['RCID'])
+                vectors.add(name)
+                if vrid['RCNM'] != EDGE:
+                    continue
+                if vrid['RUIN'] == DELETE:
+                    links['edges'].pop(vrid['RCID'], None)
+                    continue
+                nodes = get_names(record.get('VRPT', []))
+                control = record.get('VRPC')
+                if control:
+                    edge = links['edges'].setdefault(vrid['RCID'], [])
+                    apply_pointer_update(edge, (control['VPUI'], control['VPIX'], control['NVPT']), nodes)
+                elif nodes:
+                    links['edges'][vrid['RCID']] = nodes
+
+    if vectors:
+        # Moving a connected node reshapes every edge that ends on it
+        for rcid, nodes in links['edges'].items():
+            if vectors.intersection(nodes):
+                vectors.add((EDGE, rcid))
+        for feature in links['features'].values():
+            if feature['foid'] and vectors.intersection(feature['spatial']):
+                changed[feature['foid']] = feature['objl']
+    return deleted, changed
+
+
+def get_update_files(enc_path):
+    """
+    Find the update files sitting next to a base cell
+    :param str enc_path: Path to a .000 base cell
+    :returns list[str]: Update file paths in update number order
+    """
+
+    path = pathlib.Path(enc_path)
+    updates = [update for update in path.parent.glob(f'{path.stem}.*')
+               if update.suffix[1:].isdigit() and int(update.suffix[1:]) > 0]
+    return [str(update) for update in sorted(updates, key=lambda update: int(update.suffix[1:]))]
+
+
+def read_links(enc_path):
+    """
+    Build the feature to spatial record links of a base cell
+    - Needed to find features whose geometry changes when an update only touches vector records
+    :param str enc_path: Path to a .000 base cell
+    :returns dict[dict]: Features by RCID with FOID, OBJL and spatial pointers, and edge to node pointers
+    """
+
+    links = {'features': {}, 'edges': {}}
+    with ISO8211File(enc_path) as enc_file:
+        for record in enc_file:
+            frid = record.get('FRID')
+            if frid:
+                links['features'][frid['RCID']] = {
+                    'foid': get_foid(record),
+                    'objl': frid['OBJL'],
+                    'spatial': get_names(sum(record.get_all('FSPT'), []))
+                }
+                continue
+            vrid = record.get('VRID')
+            if vrid and vrid['RCNM'] == EDGE:
+                links['edges'][vrid['RCID']] = get_names(record.get('VRPT', []))
+    return links
@@ -0,0 +1,581 @@
+import struct
+
+import numpy as np
+
+
+DICTIONARY_FIELDS = ['OBJL']
+
+
+class Column:
+    """
+    Attribute values for one field with a null mask
+    - Only non-null values are stored, in row order
+    - Dictionary encoded columns store indexes into a small array of unique values
+    """
+
+    def __init__(self, values, nulls, dictionary=None) -> None:
+        self.values = values
+        self.nulls = nulls
+        self.dictionary = dictionary
+
+    def __len__(self):
+        return len(self.nulls)
+
+    @classmethod
+    def concat(cls, columns, lengths):
+        """
+        Join columns end to end, filling nulls for stores missing the field
+        :param list[Column|None] columns: Column from each store or None if missing
+        :param list[int] lengths: Row count of each store
+        :returns Column: Joined column
+        """
+
+        present = [column for column in columns if column is not None]
+        nulls = np.concatenate([column.nulls if column is not None else np.ones(length, dtype=bool)
+                                for column, length in zip(columns, lengths)])
+        if any(column.dictionary is not None for column in present):
+            values = np.concatenate([column.decode_values() for column in present])
+            dictionary, indexes = np.unique(values, return_inverse=True)
+            return cls(indexes.reshape(-1), nulls, dictionary)
+        values = np.concatenate([column.values for column in present])
+        if values.dtype == object or len({column.values.dtype for column in present}) == 1:
+            return cls(values, nulls)
+        return cls(to_array([value for column in present for value in column.values.tolist()]), nulls)
+
+    @classmethod
+    def from_values(cls, rows, values, length, dictionary_encode=False):
+        """
+        Build a column from the sparse values collected while reading
+        :param list[int] rows: Row index of each non-null value
+        :param list[any] values: Non-null values in row order
+        :param int length: Total row count
+        :param bool dictionary_encode: Store indexes into unique values
+        :returns Column: New column
+        """
+
+        nulls = np.ones(length, dtype=bool)
+        nulls[rows] = False
+        array = to_array(values)
+        if dictionary_encode and array.dtype != object:
+            dictionary, indexes = np.unique(array, return_inverse=True)
+            return cls(indexes.reshape(-1), nulls, dictionary)
+        return cls(array, nulls)
+
+    def decode(self, fill=None):
+        """
+        Expand to one value per row
+        :param any fill: Value used for null rows
+        :returns numpy.ndarray: Values for every row, object dtype when there are nulls
+        """
+
+        values = self.decode_values()
+        if not self.nulls.any():
+            return values
+        full = np.full(len(self.nulls), fill, dtype=object)
+        full[~self.nulls] = values
+        return full
+
+    def decode_values(self):
+        """
+        Non-null values with dictionary encoding removed
+        :returns numpy.ndarray: Values in row order
+        """
+
+        if self.dictionary is None:
+            return self.values
+        return self.dictionary[self.values]
+
+    def take(self, indexes):
+        """
+        Select rows by index
+        :param numpy.ndarray indexes: Row indexes
+        :returns Column: New column with only the selected rows
+        """
+
+        ranks = np.cumsum(~self.nulls) - 1
+        nulls = self.nulls[indexes]
+        values = self.values[ranks[indexes][~nulls]]
+        return Column(values, nulls, self.dictionary)
+
+    def to_list(self):
+        """
+        Python values for every row, None for nulls
+        :returns list[any]: Row values
+        """
+
+        values = [None] * len(self.nulls)
+        for row, value in zip(np.flatnonzero(~self.nulls).tolist(), self.decode_values().tolist()):
+            values[row] = value
+        return values
+
+
+class FeatureStore:
+    """
+    Columnar container for all ENC features of one geometry type
+    - coords holds every XY vertex, ring_offsets splits them into rings or line parts
+    - geom_offsets splits the rings into features; a Point is one ring of one vertex
+    - z optionally holds a value per vertex, ie: sounding depth
+    - Lines and polygons can instead be held as WKB with a bbox, the arrays are only built when first used
+    """
+
+    def __init__(self, geom_type, coords, ring_offsets, geom_offsets, columns, z=None, wkb=None, bounds=None) -> None:
+        self.geom_type = geom_type
+        self._coords = coords
+        self._ring_offsets = ring_offsets
+        self._geom_offsets = geom_offsets
+        self._bounds = bounds
+        self.columns = columns
+        self.z = z
+        self.wkb = wkb
+        self.passed = None
+
+    def __len__(self):
+        if self.wkb is not None:
+            return len(self.wkb)
+        return len(self._geom_offsets) - 1
+
+    @classmethod
+    def concat(cls, stores):
+        """
+        Join stores of the same geometry type end to end
+        :param list[FeatureStore] stores: Stores to join, ie: one per ENC cell
+        :returns FeatureStore: Single store with the union of all fields
+        """
+
+        geom_type = stores[0].geom_type
+        stores = [store for store in stores if len(store)] or [cls.empty(geom_type)]
+        fields = list(dict.fromkeys(field for store in stores for field in store.columns))
+        lengths = [len(store) for store in stores]
+        columns = {field: Column.concat([store.columns.get(field) for store in stores], lengths) for field in fields}
+        if all(store.wkb is not None for store in stores):
+            # Still undecoded, so join the WKB without building any coordinates
+            return cls.from_wkb(geom_type, np.concatenate([store.wkb for store in stores]),
+                                np.concatenate([store.bounds for store in stores]), columns)
+
+        coord_counts = np.cumsum([0] + [len(store.coords) for store in stores[:-1]])
+        ring_counts = np.cumsum([0] + [len(store.ring_offsets) - 1 for store in stores[:-1]])
+        ring_offsets = np.concatenate([stores[0].ring_offsets[:1]] + [store.ring_offsets[1:] + count
+                                       for store, count in zip(stores, coord_counts)])
+        geom_offsets = np.concatenate([stores[0].geom_offsets[:1]] + [store.geom_offsets[1:] + count
+                                       for store, count in zip(stores, ring_counts)])
+        coords = np.concatenate([store.coords for store in stores])
+        z = None
+        if any(store.z is not None for store in stores):
+            z = np.concatenate([store.z if store.z is not None else np.full(len(store.coords), np.nan) for store in stores])
+        return cls(geom_type, coords, ring_offsets, geom_offsets, columns, z)
+
+    @classmethod
+    def empty(cls, geom_type):
+        """
+        Store with no features
+        :param str geom_type: Point, LineString, Polygon, or MultiPoint
+        :returns FeatureStore: Empty store
+        """
+
+        return cls(geom_type, np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), {})
+
+    @classmethod
+    def from_features(cls, geom_type, features):
+        """
+        Build a store from GeoJSON style features
+        - MultiPoint coordinates are XYZ numpy arrays and are kept as one ring with Z values
+        - Features with 'wkb' and 'bbox' geometry instead of coordinates are kept undecoded
+        :param str geom_type: Point, LineString, Polygon, or MultiPoint
+        :param list[dict] features: GeoJSON style features of that geometry type
+        :returns FeatureStore: New store
+        """
+
+        if features and 'wkb' in features[0]['geometry']:
+            wkb = np.empty(len(features), dtype=object)
+            wkb[:] = [feature['geometry']['wkb'] for feature in features]
+            bounds = np.array([feature['geometry']['bbox'] for feature in features], dtype=np.float64).reshape(-1, 4)
+            return cls.from_wkb(geom_type, wkb, bounds, get_columns(features))
+
+        points = []
+        arrays = []
+        ring_sizes = []
+        ring_counts = []
+        for feature in features:
+            coordinates = feature['geometry']['coordinates']
+            if geom_type == 'MultiPoint':
+                arrays.append(coordinates)
+                rings = [coordinates]
+            elif geom_type == 'Point':
+                rings = [[coordinates]]
+            elif geom_type == 'LineString':
+                rings = [coordinates]
+            else:
+                rings = coordinates
+            for ring in rings:
+                if geom_type != 'MultiPoint':
+                    points.extend(ring)
+                ring_sizes.append(len(ring))
+            ring_counts.append(len(rings))
+
+        z = None
+        if geom_type == 'MultiPoint':
+            xyz = np.concatenate(arrays) if arrays else np.empty((0, 3))
+            coords, z = np.ascontiguousarray(xyz[:, :2]), np.ascontiguousarray(xyz[:, 2])
+        else:
+            coords = np.array(points, dtype=np.float64).reshape(-1, 2)
+        ring_offsets = np.concatenate([[0], np.cumsum(ring_sizes, dtype=np.int64)])
+        geom_offsets = np.concatenate([[0], np.cumsum(ring_counts, dtype=np.int64)])
+        return cls(geom_type, coords, ring_offsets, geom_offsets, get_columns(features), z)
+
+    @classmethod
+    def from_wkb(cls, geom_type, wkb, bounds, columns):
+        """
+        Build a store whose geometry stays as WKB until it is needed
+        :param str geom_type: LineString or Polygon
+        :param numpy.ndarray wkb: Little endian 2D WKB bytes of each feature
+        :param numpy.ndarray bounds: XMin, YMin, XMax, YMax of each feature
+        :param dict[str[Column]] columns: Attribute columns
+        :returns FeatureStore: New store
+        """
+
+        return cls(geom_type, None, None, None, columns, wkb=wkb, bounds=bounds)
+
+    @property
+    def bounds(self):
+        """XMin, YMin, XMax, YMax of each feature, available without decoding WKB"""
+
+        if self._bounds is None:
+            self._bounds = get_bounds(self.coords, self.ring_offsets, self.geom_offsets)
+        return self._bounds
+
+    @property
+    def coords(self):
+        """XY array of every vertex"""
+
+        self.decode()
+        return self._coords
+
+    @property
+    def fields(self):
+        """List of all field names in column order"""
+
+        return list(self.columns.keys())
+
+    @property
+    def geom_offsets(self):
+        """Start of each feature in ring_offsets"""
+
+        self.decode()
+        return self._geom_offsets
+
+    @property
+    def ring_offsets(self):
+        """Start of each ring or line part in coords"""
+
+        self.decode()
+        return self._ring_offsets
+
+    def decode(self) -> None:
+        """Build the coordinate arrays from WKB in one pass, once"""
+
+        if self.wkb is not None:
+            self._coords, self._ring_offsets, self._geom_offsets = decode_wkb(self.geom_type, self.wkb)
+            self.wkb = None
+
+    def get_rings(self, row):
+        """
+        Get the vertices of one feature
+        :param int row: Feature index
+        :returns list[numpy.ndarray]: XY array of each ring or line part
+        """
+
+        start, end = self.geom_offsets[row], self.geom_offsets[row + 1]
+        return [self.coords[self.ring_offsets[ring]:self.ring_offsets[ring + 1]] for ring in range(start, end)]
+
+    def get_wkb(self, row):
+        """
+        Get the little endian 2D WKB of one feature with all of its rings
+        - Built from the flat coordinate arrays, so polygon holes are kept without per vertex Python objects
+        :param int row: Feature index
+        :returns bytes: WKB of a Point, LineString, Polygon, or MultiPoint
+        """
+
+        if self.wkb is not None:
+            return self.wkb[row]
+        rings = [ring.astype('<f8') for ring in self.get_rings(row)]
+        if self.geom_type == 'Point':
+            return struct.pack('<BI', 1, 1) + rings[0][0].tobytes()
+        if self.geom_type == 'LineString':
+            return struct.pack('<BII', 1, 2, len(rings[0])) + rings[0].tobytes()
+        if self.geom_type == 'MultiPoint':
+            return struct.pack('<BII', 1, 4, len(rings[0])) + b''.join(struct.pack('<BI', 1, 1) + point.tobytes() for point in rings[0])
+        return struct.pack('<BII', 1, 3, len(rings)) + b''.join(struct.pack('<I', len(ring)) + ring.tobytes() for ring in rings)
+
+    def get_values(self, field, fill=None):
+        """
+        Get one value per feature for a field
+        :param str field: Field name
+        :param any fill: Value for nulls and missing fields
+        :returns numpy.ndarray: Field values
+        """
+
+        if field not in self.columns:
+            return np.full(len(self), fill, dtype=object)
+        return self.columns[field].decode(fill)
+
+    def rows(self, fields):
+        """
+        Iterate attribute values feature by feature
+        :param list[str] fields: Field names to include
+        :returns generator[list]: Values in field order, None for nulls and missing fields
+        """
+
+        columns = [self.columns[field].to_list() if field in self.columns else [None] * len(self) for field in fields]
+        for values in zip(*columns):
+            yield list(values)
+
+    def set_column(self, field, values) -> None:
+        """
+        Add or replace a column from one value per feature
+        :param str field: Field name
+        :param list|numpy.ndarray values: Values in feature order, None for nulls
+        """
+
+        values = list(values)
+        rows = [row for row, value in enumerate(values) if value is not None]
+        self.columns[field] = Column.from_values(rows, [values[row] for row in rows], len(values))
+
+    def take(self, indexes):
+        """
+        Select features by index
+        :param numpy.ndarray indexes: Feature indexes, or a boolean mask
+        :returns FeatureStore: New store with only the selected features
+        """
+
+        indexes = np.asarray(indexes)
+        if indexes.dtype == bool:
+            indexes = np.flatnonzero(indexes)
+        columns = {field: column.take(indexes) for field, column in self.columns.items()}
+        if self.wkb is not None:
+            store = FeatureStore.from_wkb(self.geom_type, self.wkb[indexes], self.bounds[indexes], columns)
+        else:
+            rings, geom_offsets = get_ranges(self.geom_offsets, indexes)
+            points, ring_offsets = get_ranges(self.ring_offsets, rings)
+            z = self.z[points] if self.z is not None else None
+            bounds = self._bounds[indexes] if self._bounds is not None else None
+            store = FeatureStore(self.geom_type, self.coords[points], ring_offsets, geom_offsets, columns, z, bounds=bounds)
+        if self.passed is not None:
+            store.passed = self.passed[indexes]
+        return store
+
+
+class SoundingsTable:
+    """
+    Exploded SOUNDG points with depth
+    - parents is a MultiPoint store holding each SOUNDG feature once; its vertices are the soundings
+    - Soundings carry parent attributes by index, only their own columns (asgnmt, invreq) are per point
+    """
+
+    def __init__(self, parents) -> None:
+        self.parents = parents
+        self.columns = {}
+        self.passed = None
+
+    def __len__(self):
+        return len(self.parents.coords)
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        Join soundings tables end to end
+        :param list[SoundingsTable] tables: Tables to join, ie: one per ENC cell
+        :returns SoundingsTable: Single table
+        """
+
+        return cls(FeatureStore.concat([table.parents for table in tables]))
+
+    @classmethod
+    def empty(cls):
+        """
+        Table with no soundings
+        :returns SoundingsTable: Empty table
+        """
+
+        return cls(FeatureStore.empty('MultiPoint'))
+
+    @classmethod
+    def from_features(cls, features):
+        """
+        Build a table from MultiPoint features
+        :param list[dict] features: GeoJSON style features with XYZ numpy array coordinates
+        :returns SoundingsTable: New table
+        """
+
+        return cls(FeatureStore.from_features('MultiPoint', features))
+
+    @property
+    def depth(self):
+        """Depth of every sounding, NaN when the cell has none"""
+
+        if self.parents.z is None:
+            return np.full(len(self), np.nan)
+        return self.parents.z
+
+    @property
+    def fields(self):
+        """List of parent fields followed by per sounding fields"""
+
+        return list(dict.fromkeys(self.parents.fields + ['DEPTH'] + list(self.columns.keys())))
+
+    @property
+    def parent_index(self):
+        """Row of the parent SOUNDG feature for every sounding"""
+
+        counts = np.diff(self.parents.ring_offsets)
+        return np.repeat(np.arange(len(counts)), counts)
+
+    @property
+    def x(self):
+        """Longitude of every sounding"""
+
+        return self.parents.coords[:, 0]
+
+    @property
+    def y(self):
+        """Latitude of every sounding"""
+
+        return self.parents.coords[:, 1]
+
+    def rows(self, fields):
+        """
+        Iterate attribute values sounding by sounding
+        :param list[str] fields: Field names to include
+        :returns generator[list]: Parent values with DEPTH and per sounding columns filled in
+        """
+
+        parent_rows = list(self.parents.rows(fields))
+        own = {'DEPTH': [None if np.isnan(depth) else depth for depth in self.depth.tolist()]}
+        own.update({field: column.to_list() for field, column in self.columns.items()})
+        own = [(fields.index(field), values) for field, values in own.items() if field in fields]
+        for sounding, parent in enumerate(self.parent_index.tolist()):
+            values = list(parent_rows[parent])
+            for position, own_values in own:
+                values[position] = own_values[sounding]
+            yield values
+
+    def set_column(self, field, values) -> None:
+        """
+        Add or replace a per sounding column
+        :param list|numpy.ndarray values: Values in sounding order, None for nulls
+        """
+
+        values = list(values)
+        rows = [row for row, value in enumerate(values) if value is not None]
+        self.columns[field] = Column.from_values(rows, [values[row] for row in rows], len(values))
+
+    def take_parents(self, indexes):
+        """
+        Select SOUNDG features, with all of their soundings, by index
+        :param numpy.ndarray indexes: Parent indexes, or a boolean mask
+        :returns SoundingsTable: New table
+        """
+
+        return SoundingsTable(self.parents.take(indexes))
+
+
+def decode_wkb(geom_type, wkb):
+    """
+    Decode little endian 2D LineString or Polygon WKB to coordinate arrays
+    - Each ring is read straight from the WKB bytes with numpy, no per vertex Python objects
+    :param str geom_type: LineString or Polygon
+    :param numpy.ndarray wkb: WKB bytes of each feature
+    :returns (numpy.ndarray, numpy.ndarray, numpy.ndarray): coords, ring_offsets and geom_offsets
+    """
+
+    parts = []
+    ring_sizes = []
+    ring_counts = []
+    for blob in wkb:
+        if geom_type == 'LineString':
+            rings, offset, sizes = 1, 5, [int.from_bytes(blob[5:9], 'little')]
+        else:
+            rings, offset, sizes = int.from_bytes(blob[5:9], 'little'), 9, []
+        for _ in range(rings):
+            count = int.from_bytes(blob[offset:offset + 4], 'little') if geom_type == 'Polygon' else sizes[0]
+            parts.append(np.frombuffer(blob, dtype='<f8', count=count * 2, offset=offset + 4))
+            offset += 4 + count * 16
+            ring_sizes.append(count)
+        ring_counts.append(rings)
+    coords = np.concatenate(parts).reshape(-1, 2) if parts else np.empty((0, 2))
+    ring_offsets = np.concatenate([[0], np.cumsum(ring_sizes, dtype=np.int64)])
+    geom_offsets = np.concatenate([[0], np.cumsum(ring_counts, dtype=np.int64)])
+    return coords, ring_offsets, geom_offsets
+
+
+def get_bounds(coords, ring_offsets, geom_offsets):
+    """
+    Get the bbox of every feature from its vertices
+    :param numpy.ndarray coords: XY array of every vertex
+    :param numpy.ndarray ring_offsets: Start of each ring in coords
+    :param numpy.ndarray geom_offsets: Start of each feature in ring_offsets
+    :returns numpy.ndarray: XMin, YMin, XMax, YMax of each feature, NaN for empty features
+    """
+
+    starts = ring_offsets[geom_offsets[:-1]]
+    ends = ring_offsets[geom_offsets[1:]]
+    bounds = np.full((len(starts), 4), np.nan)
+    filled = ends > starts
+    if filled.any():
+        # Empty features add no vertices, so each range runs to the next filled feature
+        bounds[filled, :2] = np.minimum.reduceat(coords, starts[filled], axis=0)
+        bounds[filled, 2:] = np.maximum.reduceat(coords, starts[filled], axis=0)
+    return bounds
+
+
+def get_columns(features):
+    """
+    Build attribute columns from GeoJSON style features
+    :param list[dict] features: Features with a properties dict
+    :returns dict[str[Column]]: Column by field name
+    """
+
+    fields = {}
+    for row, feature in enumerate(features):
+        for field, value in feature['properties'].items():
+            rows, values = fields.setdefault(field, ([], []))
+            if value is not None:
+                rows.append(row)
+                values.append(value)
+    return {field: Column.from_values(rows, values, len(features), field in DICTIONARY_FIELDS)
+            for field, (rows, values) in fields.items()}
+
+
+def get_ranges(offsets, indexes):
+    """
+    Gather the offset ranges of selected items
+    :param numpy.ndarray offsets: Start offset of every item plus the final end
+    :param numpy.ndarray indexes: Selected item indexes
+    :returns (numpy.ndarray, numpy.ndarray): Positions of the gathered values and their new offsets
+    """
+
+    starts = offsets[indexes]
+    lengths = offsets[indexes + 1] - starts
+    new_offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return positions, new_offsets
+
+
+def to_array(values):
+    """
+    Convert Python values to the most compact numpy array
+    :param list[any] values: Non-null values
+    :returns numpy.ndarray: int64, float64 or object array
+    """
+
+    kinds = {type(value) for value in values}
+    if kinds and kinds <= {int}:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    elif kinds and kinds <= {float}:
+        return np.array(values, dtype=np.float64)
+    array = np.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        array[index] = value  # Keeps list values, like COLOUR, as single items
+    return array
@@ -0,0 +1,330 @@
+import mmap
+import re
+import struct
+
+
+FIELD_TERMINATOR = 0x1e
+UNIT_TERMINATOR = 0x1f
+FORMAT_PATTERN = re.compile(r'(\d*)([AIRBb])(\d*)(?:\((\d+)\))?')
+
+
+class ISO8211Exception(Exception):
+    """Custom exception for malformed ISO 8211 files"""
+
+    pass
+
+
+# Raised reading malformed ISO 8211 files or S-57 records missing expected fields, ie: a DDR without DSPM
+READ_ERRORS = (ISO8211Exception, ValueError, KeyError, IndexError, TypeError)
+
+
+class FieldDefn:
+    """Subfield labels and formats for one field tag from the DDR"""
+
+    def __init__(self, tag, controls, name, labels, formats) -> None:
+        self.tag = tag
+        self.name = name
+        self.repeating = labels.startswith('*')
+        self.labels = labels.lstrip('*').split('!') if labels else []
+        self.formats = expand_formats(formats)
+        self.ucs2 = controls[6:9] == '%/A'  # S-57 lexical level 2 (NATF, NNOM)
+        self.struct = get_struct(self.formats)
+
+    def parse(self, data):
+        """
+        Decode the raw bytes of one field
+        :param bytes data: Field data, including the field terminator
+        :returns dict|list[dict]: Subfield values, a list of groups for repeating fields
+        """
+
+        if not self.labels:
+            return data[:-1]
+        if self.struct is not None:
+            # All subfields are fixed width, so unpack whole groups at once
+            size = self.struct.size
+            end = len(data) - 1 - ((len(data) - 1) % size) if size else 0
+            groups = [self.convert(values) for values in self.struct.iter_unpack(data[:end])]
+        else:
+            groups = []
+            offset = 0
+            while offset < len(data) - 1:
+                values, offset = self.read_group(data, offset)
+                groups.append(values)
+                if not self.repeating:
+                    break
+        if self.repeating:
+            return groups
+        return groups[0] if groups else {}
+
+    def convert(self, values):
+        """
+        Convert struct unpacked values to subfield values
+        :param tuple values: Raw values in subfield order
+        :returns dict: Subfield values by label
+        """
+
+        group = {}
+        for label, (kind, _), value in zip(self.labels, self.formats, values):
+            if kind == 'A':
+                value = value.decode('latin-1')
+            elif kind in ['I', 'R']:
+                value = convert_number(kind, value)
+            group[label] = value
+        return group
+
+    def read_group(self, data, offset):
+        """
+        Read one group of variable width subfields
+        :param bytes data: Field data
+        :param int offset: Start of the group
+        :returns (dict, int): Subfield values and the offset after the group
+        """
+
+        group = {}
+        for label, (kind, width) in zip(self.labels, self.formats):
+            if width is None:
+                terminator = b'\x1f\x00' if self.ucs2 and kind == 'A' else b'\x1f'
+                end = find_terminator(data, offset, terminator)
+                raw = data[offset:end]
+                next_offset = end + len(terminator)
+                if data[end:end + 1] == b'\x1e':
+                    next_offset = end
+            else:
+                raw = data[offset:offset + width]
+                next_offset = offset + width
+            group[label] = convert_value(kind, width, raw, self.ucs2)
+            offset = next_offset
+        return group, offset
+
+
+class Record:
+    """One data record; fields are only sliced from the file and decoded on access"""
+
+    def __init__(self, ddr, data, entries) -> None:
+        self.ddr = ddr
+        self.data = data
+        self.entries = entries
+
+    @property
+    def tags(self):
+        """List of field tags in record order"""
+
+        return [tag for tag, _, _ in self.entries]
+
+    def get(self, tag, default=None):
+        """
+        Decode the first field with a tag
+        :param str tag: Field tag, ie: FRID
+        :param any default: Value when the field is missing
+        :returns dict|list[dict]: Subfield values
+        """
+
+        for field_tag, start, length in self.entries:
+            if field_tag == tag:
+                return self.ddr[tag].parse(self.data[start:start + length])
+        return default
+
+    def get_all(self, tag):
+        """
+        Decode every field with a tag, for fields that repeat within a record
+        :param str tag: Field tag, ie: FSPT
+        :returns list[dict|list[dict]]: Subfield values for each field
+        """
+
+        return [self.ddr[tag].parse(self.data[start:start + length]) for field_tag, start, length in self.entries if field_tag == tag]
+
+
+class ISO8211File:
+    """
+    Sequential reader for ISO/IEC 8211 files such as S-57 cells and CATALOG.031
+    - The file is memory mapped, so only the fields that are accessed are read from disk
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        with open(path, 'rb') as iso_file:
+            try:
+                self.data = mmap.mmap(iso_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ISO8211Exception(f'Empty ISO 8211 file: {path}')
+        self.ddr = {}
+        try:
+            self.records_offset = self.read_ddr()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        return self.records()
+
+    def close(self) -> None:
+        """Release the memory map, records already read must not be used afterwards"""
+
+        self.data.close()
+
+    def read_ddr(self) -> int:
+        """
+        Read the Data Descriptive Record at the start of the file
+        :returns int: Offset of the first data record
+        """
+
+        length, entries = read_record(self.data, 0)
+        leader = self.data[:24]
+        control_length = int(leader[10:12] or 9)
+        for tag, start, field_length in entries:
+            if tag == '0000':
+                continue  # File control field
+            data = self.data[start:start + field_length]
+            controls = data[:control_length].decode('latin-1')
+            parts = data[control_length:].rstrip(b'\x1e').split(b'\x1f')
+            parts += [b''] * (3 - len(parts))
+            name, labels, formats = [part.decode('latin-1') for part in parts[:3]]
+            self.ddr[tag] = FieldDefn(tag, controls, name, labels, formats)
+        return length
+
+    def records(self):
+        """
+        Yield each data record in file order
+        :returns generator[Record]: Data records
+        """
+
+        offset = self.records_offset
+        while offset < len(self.data):
+            length, entries = read_record(self.data, offset)
+            yield Record(self.ddr, self.data, entries)
+            offset += length
+
+
+def convert_number(kind, raw):
+    """
+    Convert ASCII digits to a number
+    :param str kind: I for integer or R for real
+    :param bytes raw: Subfield bytes
+    :returns int|float|None: Value or None when empty
+    """
+
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        return int(raw) if kind == 'I' else float(raw)
+    except ValueError:
+        return None
+
+
+def convert_value(kind, width, raw, ucs2=False):
+    """
+    Convert the bytes of one subfield
+    :param str kind: Format character
+    :param int|None width: Fixed width in bytes or None for variable width
+    :param bytes raw: Subfield bytes
+    :param bool ucs2: Decode character data as UCS-2
+    :returns any: Subfield value
+    """
+
+    if kind == 'A':
+        return raw.decode('utf-16-le' if ucs2 else 'latin-1', errors='replace')
+    if kind in ['I', 'R']:
+        return convert_number(kind, raw)
+    if kind == 'b':
+        return int.from_bytes(raw, 'little', signed=False)
+    if kind == 'bs':
+        return int.from_bytes(raw, 'little', signed=True)
+    return bytes(raw)
+
+
+def expand_formats(formats):
+    """
+    Expand format controls like (b11,2b12,A,B(40)) to one entry per subfield
+    :param str formats: Format controls from the DDR
+    :returns list[(str, int|None)]: Format kind and fixed byte width per subfield
+    """
+
+    expanded = []
+    for count, kind, binary, width in FORMAT_PATTERN.findall(formats):
+        if kind == 'b':
+            size = int(binary[1:]) if len(binary) > 1 else 1
+            entry = ('bs' if binary[:1] == '2' else 'b', size)
+        elif kind == 'B':
+            entry = ('B', int(width) // 8)
+        else:
+            entry = (kind, int(width) if width else None)
+        expanded.extend([entry] * int(count or 1))
+    return expanded
+
+
+def find_terminator(data, offset, terminator):
+    """
+    Find the end of a variable width subfield
+    :param bytes data: Field data
+    :param int offset: Start of the subfield
+    :param bytes terminator: Unit terminator sequence
+    :returns int: Offset of the terminator or field terminator
+    """
+
+    end = data.find(terminator, offset)
+    field_end = len(data) - 1
+    if end == -1 or end > field_end:
+        return field_end
+    return end
+
+
+def get_struct(formats):
+    """
+    Build a struct for fixed width groups
+    :param list[(str, int|None)] formats: Expanded subfield formats
+    :returns struct.Struct|None: Struct for the whole group or None if any subfield is variable
+    """
+
+    codes = {('b', 1): 'B', ('b', 2): 'H', ('b', 4): 'I', ('bs', 1): 'b', ('bs', 2): 'h', ('bs', 4): 'i'}
+    layout = '<'
+    for kind, width in formats:
+        if width is None:
+            return None
+        if kind in ['b', 'bs']:
+            if (kind, width) not in codes:
+                return None
+            layout += codes[(kind, width)]
+        else:
+            layout += f'{width}s'
+    return struct.Struct(layout)
+
+
+def read_record(data, offset):
+    """
+    Walk the leader and directory of one record without reading its fields
+    :param bytes|mmap.mmap data: Whole file contents
+    :param int offset: Start of the record
+    :returns (int, list[(str, int, int)]): Record length and (tag, field start, field length) entries
+    """
+
+    leader = data[offset:offset + 24]
+    if len(leader) < 24:
+        raise ISO8211Exception(f'Truncated record leader at byte {offset}')
+    try:
+        length = int(leader[0:5])
+        base_address = int(leader[12:17])
+        size_length, size_position, size_tag = int(leader[20:21]), int(leader[21:22]), int(leader[23:24])
+    except ValueError:
+        raise ISO8211Exception(f'Invalid record leader at byte {offset}')
+    entry_size = size_tag + size_length + size_position
+    entries = []
+    position = offset + 24
+    field_area = offset + base_address
+    end = offset + base_address
+    directory = data[position:end]
+    for entry_start in range(0, len(directory) - 1, entry_size):
+        entry = directory[entry_start:entry_start + entry_size]
+        if entry[0] == FIELD_TERMINATOR or len(entry) < entry_size:
+            break
+        tag = entry[:size_tag].decode('latin-1')
+        field_length = int(entry[size_tag:size_tag + size_length])
+        field_position = int(entry[size_tag + size_length:])
+        entries.append((tag, field_area + field_position, field_length))
+    return length, entries
@@ -0,0 +1,122 @@
+import numpy as np
+
+from helpers.spatial import check_shapely, shapely
+
+
+GRID_SIZE = 256  # cells along the longer side of the polygons' bbox
+CHUNK_SIZE = 1 << 22  # point and edge pairs per ray casting step
+
+
+class PointGrid:
+    """
+    Uniform grid over polygons for classifying millions of points in one call
+    - Each cell is marked inside, outside or boundary once, with GEOS
+    - Points in inside or outside cells are answered by a lookup, only points in boundary cells are ray cast
+    - Ray casting uses the even-odd rule, so holes work, and points on an edge or vertex count as inside
+    - That matches SelectLayerByLocation INTERSECT and shapely.intersects_xy for points on the sheet edges
+    """
+
+    OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+
+    def __init__(self, polygons, grid_size=GRID_SIZE) -> None:
+        """
+        :param shapely.Geometry polygons: Polygon or MultiPolygon without overlapping parts, ie: a dissolved union
+        :param int grid_size: Number of cells along the longer side of the bbox
+        """
+
+        check_shapely('The point grid')
+        self.xmin, self.ymin, xmax, ymax = shapely.bounds(polygons).tolist()
+        self.size = max(xmax - self.xmin, ymax - self.ymin) / grid_size or 1.0
+        self.columns = max(1, int(np.ceil((xmax - self.xmin) / self.size)))
+        self.rows = max(1, int(np.ceil((ymax - self.ymin) / self.size)))
+        self.edges = get_edges(polygons)
+        self.cells = self.get_cell_states(polygons)
+        # Edges crossing the band of each grid row, the only ones a ray from that row can cross
+        low = np.minimum(self.edges[:, 1], self.edges[:, 3])
+        high = np.maximum(self.edges[:, 1], self.edges[:, 3])
+        bands = self.ymin + np.arange(self.rows + 1) * self.size
+        self.row_edges = [np.flatnonzero((low <= bands[row + 1]) & (high >= bands[row])) for row in range(self.rows)]
+
+    def contains(self, x, y):
+        """
+        Test many points against the polygons
+        :param numpy.ndarray x: X of each point
+        :param numpy.ndarray y: Y of each point
+        :returns numpy.ndarray: True for points inside the polygons or on their boundary
+        """
+
+        in_grid = ((x >= self.xmin) & (x <= self.xmin + self.columns * self.size) &
+                   (y >= self.ymin) & (y <= self.ymin + self.rows * self.size))
+        # Points on the far edge of the grid belong to the last cell
+        columns = np.clip(np.floor((x - self.xmin) / self.size), 0, self.columns - 1).astype(np.int64)
+        rows = np.clip(np.floor((y - self.ymin) / self.size), 0, self.rows - 1).astype(np.int64)
+        states = np.full(len(x), self.OUTSIDE, dtype=np.int8)
+        states[in_grid] = self.cells[rows[in_grid], columns[in_grid]]
+        inside = states == self.INSIDE
+        boundary = np.flatnonzero(states == self.BOUNDARY)
+        boundary = boundary[np.argsort(rows[boundary], kind='stable')]
+        row_starts = np.flatnonzero(np.diff(rows[boundary], prepend=-1))
+        for points in np.split(boundary, row_starts[1:]):
+            if len(points):
+                inside[points] = ray_cast(x[points], y[points], self.edges[self.row_edges[rows[points[0]]]])
+        return inside
+
+    def get_cell_states(self, polygons):
+        """
+        Mark every grid cell as inside, outside or on the boundary of the polygons
+        :param shapely.Geometry polygons: Polygon or MultiPolygon
+        :returns numpy.ndarray: Rows by columns array of cell states
+        """
+
+        columns, rows = np.meshgrid(np.arange(self.columns), np.arange(self.rows))
+        xmin = self.xmin + columns.ravel() * self.size
+        ymin = self.ymin + rows.ravel() * self.size
+        boxes = shapely.box(xmin, ymin, xmin + self.size, ymin + self.size)
+        shapely.prepare(polygons)
+        states = np.full(len(boxes), self.BOUNDARY, dtype=np.int8)
+        states[~shapely.intersects(polygons, boxes)] = self.OUTSIDE
+        states[shapely.contains_properly(polygons, boxes)] = self.INSIDE
+        return states.reshape(self.rows, self.columns)
+
+
+def get_edges(polygons):
+    """
+    Get every ring segment of polygons
+    :param shapely.Geometry polygons: Polygon or MultiPolygon
+    :returns numpy.ndarray: X0, Y0, X1, Y1 of each segment
+    """
+
+    rings = shapely.get_rings(shapely.get_parts(polygons))
+    coords, ring_index = shapely.get_coordinates(rings, return_index=True)
+    same_ring = ring_index[1:] == ring_index[:-1]
+    return np.column_stack([coords[:-1][same_ring], coords[1:][same_ring]])
+
+
+def ray_cast(x, y, edges):
+    """
+    Even-odd test of points against ring segments, a ray is cast from each point in +X
+    - Points lying on a segment, including its end vertices, are inside whatever the crossing count
+    :param numpy.ndarray x: X of each point
+    :param numpy.ndarray y: Y of each point
+    :param numpy.ndarray edges: X0, Y0, X1, Y1 of every segment the rays may cross
+    :returns numpy.ndarray: True for points with an odd number of crossings or on a segment
+    """
+
+    inside = np.zeros(len(x), dtype=bool)
+    if not len(edges):
+        return inside
+    x0, y0, x1, y1 = edges.T
+    step = max(1, CHUNK_SIZE // len(edges))
+    for start in range(0, len(x), step):
+        px = x[start:start + step, None]
+        py = y[start:start + step, None]
+        spans = (y0 > py) != (y1 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing_x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+        crossings = spans & (px < crossing_x)
+        # Collinear with the segment and within its bbox
+        on_edge = (((x1 - x0) * (py - y0) == (y1 - y0) * (px - x0)) &
+                   (px >= np.minimum(x0, x1)) & (px <= np.maximum(x0, x1)) &
+                   (py >= np.minimum(y0, y1)) & (py <= np.maximum(y0, y1)))
+        inside[start:start + step] = (np.count_nonzero(crossings, axis=1) % 2 == 1) | on_edge.any(axis=1)
+    return inside
@@ -0,0 +1,142 @@
+import os
+import csv
+import pathlib
+
+import numpy as np
+
+from engines.class_code_lookup import class_codes as CLASS_CODES
+
+try:
+    from osgeo import gdal
+except ImportError:  # Optional, the catalog falls back to class_code_lookup
+    gdal = None
+
+
+CATALOG_FILES = {'classes': 's57objectclasses.csv'}
+CATALOG = None  # Built on first use by get_catalog()
+
+
+class S57Catalog:
+    """
+    S-57 object class catalog as a dense table indexed by code
+    - Whole columns of codes are translated with numpy.take instead of a dict lookup per row
+    - Code 0 is unused by S-57, so it holds the empty acronym for unknown codes
+    """
+
+    def __init__(self, classes) -> None:
+        """
+        :param dict[int[tuple[str]]] classes: Acronym and name by object class code
+        """
+
+        self.class_acronyms = get_code_table(classes, 0)
+        self.class_codes = {acronym: code for code, (acronym, _) in classes.items() if acronym}
+
+    @classmethod
+    def from_csv(cls, folder):
+        """
+        Build the catalog from the S-57 CSV files shipped with GDAL
+        - NOAA specific classes from class_code_lookup, ie: 11003 survey, are added when missing from the CSV
+        :param str folder: Folder holding s57objectclasses.csv
+        :returns S57Catalog: Catalog of every class in the CSV file
+        """
+
+        folder = pathlib.Path(folder)
+        classes = {int(row['Code']): (row['Acronym'], row['ObjectClass']) for row in read_csv(folder / CATALOG_FILES['classes'])}
+        for code, names in CLASS_CODES.items():
+            if isinstance(code, int):
+                classes.setdefault(code, names)
+        return cls(classes)
+
+    @classmethod
+    def from_lookup(cls):
+        """
+        Build the catalog from class_code_lookup when the GDAL CSV files are not found
+        :returns S57Catalog: Catalog of the classes in class_code_lookup
+        """
+
+        return cls({code: names for code, names in CLASS_CODES.items() if isinstance(code, int)})
+
+    def get_acronyms(self, codes):
+        """
+        Translate object class codes, ie: the OBJL column, to acronyms
+        :param numpy.ndarray codes: OBJL of each feature, None for nulls
+        :returns numpy.ndarray: Acronym of each code, empty for unknown codes and None for nulls
+        """
+
+        return take_codes(self.class_acronyms, codes)
+
+
+def find_catalog_folder():
+    """
+    Find the folder of the GDAL S-57 CSV files, the same search as the OGR S57 driver
+    :returns pathlib.Path|None: Folder holding s57objectclasses.csv, None when it is not found
+    """
+
+    folders = [os.environ.get('S57_CSV'), os.environ.get('GDAL_DATA')]
+    if gdal is not None:
+        path = gdal.FindFile('gdal', CATALOG_FILES['classes'])
+        folders.insert(1, os.path.dirname(path) if path else None)
+    for folder in folders:
+        if folder and (pathlib.Path(folder) / CATALOG_FILES['classes']).exists():
+            return pathlib.Path(folder)
+    return None
+
+
+def get_catalog():
+    """
+    Get the catalog for this process, built once on first use
+    :returns S57Catalog: Catalog from the GDAL CSV files, or from class_code_lookup without them
+    """
+
+    global CATALOG
+    if CATALOG is None:
+        folder = find_catalog_folder()
+        CATALOG = S57Catalog.from_csv(folder) if folder else S57Catalog.from_lookup()
+    return CATALOG
+
+
+def get_code_table(entries, item):
+    """
+    Build a dense table indexed by code from a sparse dict
+    :param dict[int[tuple[str]]] entries: Values by code
+    :param int item: Index of the value to put in the table
+    :returns numpy.ndarray: Object array of length max code + 1, empty strings for missing codes
+    """
+
+    table = np.full(max(entries.keys(), default=0) + 1, '', dtype=object)
+    for code, names in entries.items():
+        table[code] = names[item]
+    return table
+
+
+def read_csv(path):
+    """
+    Read one of the GDAL S-57 CSV files
+    :param pathlib.Path path: CSV file with a header row
+    :returns list[dict]: One dict per row keyed by the header
+    """
+
+    with open(path, 'r', newline='', encoding='latin-1') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def take_codes(table, codes):
+    """
+    Translate a whole column of codes with one numpy.take
+    :param numpy.ndarray table: Dense table from get_code_table()
+    :param numpy.ndarray codes: Integer codes, None for nulls
+    :returns numpy.ndarray: Table value of each code, empty for codes outside the table and None for nulls
+    """
+
+    codes = np.asarray(codes)
+    if codes.dtype == object:
+        nulls = np.equal(codes, None)
+        codes = np.where(nulls, 0, codes).astype(np.int64)
+    else:
+        nulls = np.zeros(len(codes), dtype=bool)
+        codes = codes.astype(np.int64)
+    inside = (codes >= 0) & (codes < len(table))
+    names = np.take(table, np.where(inside, codes, 0))
+    names[nulls] = None
+    return names
+
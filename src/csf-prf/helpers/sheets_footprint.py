@@ -0,0 +1,184 @@
+import numpy as np
+
+from helpers.point_in_polygon import PointGrid
+from helpers.spatial import check_shapely, get_geometries, shapely
+from helpers.spatial_tiles import get_geometry_sizes, get_tile_batches
+
+
+class SheetsFootprint:
+    """
+    Sheet polygons prepared once per run for the ENC spatial filter
+    - union is the dissolved footprint of every sheet, prepared for repeated GEOS predicates
+    - tree indexes the bbox of each sheet, so far features are rejected without touching a sheet geometry
+    - attributes hold sheet values, ie: scale, that features are tagged with by join()
+    """
+
+    def __init__(self, sheets, attributes=None) -> None:
+        """
+        :param numpy.ndarray sheets: WGS84 shapely geometry of each sheet
+        :param dict[str[numpy.ndarray]] attributes: Values of each sheet by field name
+        """
+
+        check_shapely('The sheets footprint')
+        self.sheets = np.asarray(sheets, dtype=object)
+        self.attributes = attributes or {}
+        # Largest scale (smallest denominator) first, sheets without a scale last
+        scales = np.array([np.inf if scale is None else scale for scale in self.attributes.get('scale', [None] * len(self.sheets))], dtype=np.float64)
+        self.ranks = np.argsort(np.argsort(scales, kind='stable'), kind='stable')
+        self.bounds = shapely.bounds(self.sheets).reshape(-1, 4)
+        self.tree = shapely.STRtree(self.sheets)
+        self.union = shapely.union_all(self.sheets)
+        shapely.prepare(self.union)
+        self.interiors = {}  # Union shrunk by a margin, by margin
+        self.grid = None
+
+    def __len__(self):
+        return len(self.sheets)
+
+    def classify(self, bounds, margin=0.0):
+        """
+        Sort features by where their bbox lies, without building their geometry
+        - outside: the bbox, padded by margin, misses the bbox of every sheet
+        - inside: the bbox lies in the interior of the footprint shrunk by margin, so the feature does as well
+        - edge: everything else, only these need an exact intersection test
+        - A margin covers an exact test done in another projection, ie: SelectLayerByLocation against the projected sheets
+        :param numpy.ndarray bounds: XMin, YMin, XMax, YMax of each feature
+        :param float margin: Distance in degrees from the footprint within which features are left to the exact test
+        :returns (numpy.ndarray, numpy.ndarray, numpy.ndarray): Masks of inside, outside and edge features
+        """
+
+        near = np.zeros(len(bounds), dtype=bool)
+        inside = np.zeros(len(bounds), dtype=bool)
+        if len(bounds) and len(self.sheets):
+            envelopes = get_envelopes(bounds)
+            padded = get_envelopes(bounds + np.array([-margin, -margin, margin, margin])) if margin > 0 else envelopes
+            hits, _ = self.tree.query(padded)
+            near[hits] = True
+            rows = np.flatnonzero(near)
+            inside[rows] = shapely.contains_properly(self.get_interior(margin), envelopes[rows])
+        return inside, ~near, near & ~inside
+
+    def contains_points(self, x, y):
+        """
+        Classify points, ie: exploded soundings, against the footprint without building point geometry
+        - The point grid is only built the first time points are tested
+        :param numpy.ndarray x: X of each point
+        :param numpy.ndarray y: Y of each point
+        :returns numpy.ndarray: True for points inside the footprint or on its edge
+        """
+
+        if not len(self.sheets):
+            return np.zeros(len(x), dtype=bool)
+        if self.grid is None:
+            self.grid = PointGrid(self.union)
+        return self.grid.contains(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+
+    def covers(self, geometries):
+        """
+        Exact test of features lying wholly within the prepared footprint, edges included
+        :param numpy.ndarray geometries: shapely geometry of each feature
+        :returns numpy.ndarray: True for features with no part outside every sheet
+        """
+
+        return shapely.covers(self.union, geometries)
+
+    def get_attributes(self, sheets):
+        """
+        Look up the sheet values for joined features
+        :param numpy.ndarray sheets: Sheet index of each feature from join(), -1 for none
+        :returns dict[str[list]]: Values of each feature by field name, None for features without a sheet
+        """
+
+        joined = sheets >= 0
+        attributes = {}
+        for field, values in self.attributes.items():
+            feature_values = np.full(len(sheets), None, dtype=object)
+            feature_values[joined] = np.asarray(values, dtype=object)[sheets[joined]]
+            attributes[field] = feature_values.tolist()
+        return attributes
+
+    def get_interior(self, margin):
+        """
+        Get the footprint shrunk by a margin, built and prepared once per margin
+        :param float margin: Distance in degrees to shrink the footprint by, 0 for the footprint itself
+        :returns shapely.Geometry: Prepared footprint
+        """
+
+        if margin <= 0:
+            return self.union
+        if margin not in self.interiors:
+            self.interiors[margin] = shapely.buffer(self.union, -margin)
+            shapely.prepare(self.interiors[margin])
+        return self.interiors[margin]
+
+    def get_passed(self, store, memory_limit=0):
+        """
+        Spatially filter the features of a store against the footprint
+        - Points are classified with the point grid, other features by their bbox first
+        - Only features along the sheet edges are built, in tiled batches under memory_limit
+        :param FeatureStore store: Columnar features of one geometry type
+        :param int memory_limit: Bytes of built geometry allowed per batch, 0 or less for a single batch
+        :returns numpy.ndarray: True for features intersecting any sheet
+        """
+
+        if store.geom_type == 'Point':
+            return self.contains_points(store.coords[:, 0], store.coords[:, 1])
+        inside, _, edge = self.classify(store.bounds)
+        passed = inside.copy()
+        candidates = np.flatnonzero(edge)
+        if len(candidates):
+            for batch in get_tile_batches(store.bounds[candidates], get_geometry_sizes(store, candidates), memory_limit):
+                rows = candidates[batch]
+                passed[rows] = self.intersects(get_geometries(store, rows))
+        return passed
+
+    def intersects(self, geometries):
+        """
+        Exact test of features against the prepared footprint
+        :param numpy.ndarray geometries: shapely geometry of each feature
+        :returns numpy.ndarray: True for features intersecting any sheet
+        """
+
+        return shapely.intersects(self.union, geometries)
+
+    def join(self, geometries):
+        """
+        Find the sheet of each feature with one bulk STRtree query
+        - Where sheets overlap the largest scale sheet wins, then the first sheet
+        :param numpy.ndarray geometries: shapely geometry of each feature
+        :returns numpy.ndarray: Sheet index of each feature, -1 for features outside every sheet
+        """
+
+        sheets = np.full(len(geometries), -1, dtype=np.int64)
+        if len(geometries) and len(self.sheets):
+            features, hits = self.tree.query(geometries, predicate='intersects')
+            order = np.lexsort((self.ranks[hits], features))
+            features, hits = features[order], hits[order]
+            first = np.flatnonzero(np.diff(features, prepend=-1))
+            sheets[features[first]] = hits[first]
+        return sheets
+
+
+def get_envelopes(bounds):
+    """
+    Build the envelope geometry of many bboxes
+    - Zero width or height boxes become points or lines, which GEOS handles better than empty area polygons
+    :param numpy.ndarray bounds: XMin, YMin, XMax, YMax of each feature
+    :returns numpy.ndarray: shapely Point, LineString or Polygon of each bbox
+    """
+
+    corners = np.stack([bounds[:, :2], bounds[:, 2:]], axis=1)
+    return shapely.envelope(shapely.multipoints(corners))
+
+
+def get_passed_mask(sheets, store, memory_limit=0):
+    """
+    Spatially filter ENC features against sheet polygons without arcpy
+    - Builds a footprint for a single store, reuse a SheetsFootprint to filter several
+    :param numpy.ndarray sheets: WGS84 shapely geometry of each sheet
+    :param FeatureStore store: Columnar features of one geometry type
+    :param int memory_limit: Bytes of built geometry allowed per batch, 0 or less for a single batch
+    :returns numpy.ndarray: True for features intersecting any sheet
+    """
+
+    return SheetsFootprint(sheets).get_passed(store, memory_limit)
@@ -0,0 +1,67 @@
+import numpy as np
+
+try:
+    import shapely
+except ImportError:  # Optional, only the shapely based spatial stages need it
+    shapely = None
+
+
+class SpatialException(Exception):
+    """Custom exception for the shapely based spatial stages"""
+
+    pass
+
+
+def check_shapely(stage) -> None:
+    """
+    Make sure shapely 2 is available before a stage that needs it
+    :param str stage: Name of the stage for the error message
+    """
+
+    if shapely is None or not hasattr(shapely, 'from_ragged_array'):
+        raise SpatialException(f'{stage} needs the shapely 2 package in the ArcGIS Pro Python environment')
+
+
+def get_geometries(store, rows=None):
+    """
+    Convert every feature of a store to shapely geometry in one vectorized call
+    :param FeatureStore store: Columnar features, MultiPoint for SOUNDG parents
+    :param numpy.ndarray rows: Only convert these features
+    :returns numpy.ndarray: shapely geometry of each feature in store order, or in rows order
+    """
+
+    check_shapely('Converting ENC features')
+    if store.wkb is not None:
+        return shapely.from_wkb(store.wkb if rows is None else store.wkb[rows])
+    if store.geom_type == 'Point':
+        return shapely.points(store.coords if rows is None else store.coords[rows])
+    if rows is not None:
+        store = store.take(rows)
+    if store.geom_type == 'LineString':
+        return shapely.from_ragged_array(shapely.GeometryType.LINESTRING, store.coords, (store.ring_offsets,))
+    if store.geom_type == 'MultiPoint':
+        return shapely.from_ragged_array(shapely.GeometryType.MULTIPOINT, store.coords, (store.ring_offsets,))
+    return shapely.from_ragged_array(shapely.GeometryType.POLYGON, store.coords, (store.ring_offsets, store.geom_offsets))
+
+
+def get_points(x, y):
+    """
+    Convert coordinate arrays to shapely points, ie: for exploded soundings
+    :param numpy.ndarray x: X of each point
+    :param numpy.ndarray y: Y of each point
+    :returns numpy.ndarray: shapely Points
+    """
+
+    check_shapely('Converting points')
+    return shapely.points(x, y)
+
+
+def get_polygons(polygons):
+    """
+    Convert polygons given as rings to shapely geometry
+    :param list[list[numpy.ndarray]] polygons: Outer ring followed by any holes of each polygon
+    :returns numpy.ndarray: shapely Polygons
+    """
+
+    check_shapely('Converting polygons')
+    return np.array([shapely.Polygon(rings[0], rings[1:]) for rings in polygons if len(rings) and len(rings[0]) > 3], dtype=object)
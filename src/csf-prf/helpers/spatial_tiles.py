@@ -0,0 +1,55 @@
+import numpy as np
+
+
+GEOMETRY_OVERHEAD = 256  # bytes per built geometry on top of its coordinates, GEOS or arcpy
+COORDINATE_FACTOR = 2  # built geometry holds its coordinates about twice, ie: WKB and GEOS/arcpy copies
+
+
+def get_geometry_sizes(store, rows):
+    """
+    Estimate the memory needed to build the geometry of features
+    :param FeatureStore store: Columnar features
+    :param numpy.ndarray rows: Feature indexes
+    :returns numpy.ndarray: Estimated bytes per feature in rows order
+    """
+
+    if store.wkb is not None:
+        coordinate_bytes = np.fromiter((len(wkb) for wkb in store.wkb[rows]), dtype=np.int64, count=len(rows))
+    else:
+        vertex_counts = store.ring_offsets[store.geom_offsets[1:]] - store.ring_offsets[store.geom_offsets[:-1]]
+        coordinate_bytes = vertex_counts[rows] * 16
+    return coordinate_bytes * COORDINATE_FACTOR + GEOMETRY_OVERHEAD
+
+
+def get_tile_batches(bounds, sizes, memory_limit):
+    """
+    Split features into batches of grid tiles whose built geometry stays under a memory ceiling
+    - The extent of the features is split into a square grid, each feature belongs to the tile holding its bbox centre
+    - Batches follow tile order, so each one covers a compact area; a tile too large for one batch is split
+    :param numpy.ndarray bounds: XMin, YMin, XMax, YMax of each feature
+    :param numpy.ndarray sizes: Estimated bytes per feature from get_geometry_sizes()
+    :param int memory_limit: Bytes allowed per batch, 0 or less for a single batch
+    :returns list[numpy.ndarray]: Positions in bounds of the features in each batch
+    """
+
+    total = int(sizes.sum())
+    if not len(bounds) or memory_limit <= 0 or total <= memory_limit:
+        return [np.arange(len(bounds))]
+
+    tiles_per_side = int(np.ceil(np.sqrt(total / memory_limit)))
+    centres = (bounds[:, :2] + bounds[:, 2:]) / 2
+    low, high = centres.min(axis=0), centres.max(axis=0)
+    tile_size = np.where(high > low, (high - low) / tiles_per_side, 1.0)
+    tiles = np.clip(((centres - low) // tile_size).astype(np.int64), 0, tiles_per_side - 1)
+    order = np.lexsort((tiles[:, 0], tiles[:, 1]))
+
+    batches = []
+    start = 0
+    used = 0
+    for position, size in enumerate(sizes[order].tolist()):
+        if used + size > memory_limit and position > start:
+            batches.append(order[start:position])
+            start, used = position, 0
+        used += size
+    batches.append(order[start:])
+    return batches
@@ -0,0 +1,87 @@
+import pytest
+import pathlib
+import arcpy
+import yaml
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from engines.ENCReaderEngine import ENCReaderEngine
+from helpers.enc_decoder import decode_enc_file
+from helpers.enc_index import read_cell_index
+from helpers.feature_store import FeatureStore, SoundingsTable
+
+
+REPO = pathlib.Path(__file__).parents[2]
+INPUTS = REPO / 'inputs'
+ENC_FILE = str(INPUTS / 'US5BOSBE.000')
+SHAPEFILE = str(INPUTS / 'OPR_A325_KR_24_Sheets_09262023_FULL_AREA_NO_LIDAR.shp')
+
+
+@pytest.fixture
+def victim():
+    return ENCReaderEngine(param_lookup={}, sheets_layer=SHAPEFILE)
+
+
+@pytest.fixture(autouse=True)
+def s57_options(monkeypatch):
+    monkeypatch.setenv('OGR_S57_OPTIONS', 'SPLIT_MULTIPOINT=OFF')
+
+
+def test_read_split_cells(victim, tmp_path):
+    whole = decode_enc_file(ENC_FILE)
+    indexes = {ENC_FILE: read_cell_index(ENC_FILE)}
+    # Threads stand in for worker processes, read_split_cells only submits tasks
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        cells = victim.read_split_cells(pool, 2, [ENC_FILE], indexes, str(tmp_path), {})
+        assert cells[0]['cache'] == 'miss'
+        for geom_type in ['Point', 'LineString', 'Polygon']:
+            assert len(cells[0][geom_type]) == len(whole[geom_type])
+        assert len(cells[0]['MultiPoint']) == len(whole['MultiPoint'])
+        # Once cached the cell is read whole
+        assert victim.read_split_cells(pool, 2, [ENC_FILE], indexes, str(tmp_path), {})[0]['cache'] == 'hit'
+
+
+def test_set_passed_invreq(victim):
+    with open(str(INPUTS / 'invreq_lookup.yaml'), 'r') as lookup:
+        objl_lookup = yaml.safe_load(lookup)
+    invreq_options = objl_lookup['OPTIONS']
+    attributes = [
+        {'OBJL_NAME': 'MORFAC', 'CATMOR': 1},
+        {'OBJL_NAME': 'OBSTRN', 'CATOBS': 2},
+        {'OBJL_NAME': 'OBSTRN', 'CATOBS': None},
+        {'OBJL_NAME': 'UWTROC', 'WATLEV': 3},
+        {'OBJL_NAME': 'SBDARE'},
+        {'OBJL_NAME': 'BOYLAT'},
+    ]
+    features = FeatureStore.from_features('Point', [{'geometry': {'type': 'Point', 'coordinates': [0.0, 0.0]},
+                                                     'properties': properties} for properties in attributes])
+    invreq = [''] * len(features)
+    victim.set_passed_invreq('Point', features, np.arange(len(features)), objl_lookup, invreq_options, invreq)
+    # Attribute rules compare the layer text, so integer codes never select an option
+    assert invreq[:4] == ['', '', '', '']
+    assert invreq[4] == invreq_options[13]
+    assert invreq[5] == invreq_options[2]
+
+
+def test_build_soundings_layer_batches(victim):
+    xyz = np.array([[-70.9, 42.3, 5.0], [-70.8, 42.3, 6.0], [-70.7, 42.4, 7.0]])
+    soundings = SoundingsTable.from_features([{'geometry': {'type': 'MultiPoint', 'coordinates': xyz}, 'properties': {}}])
+    # Every batch rebuilds the same memory layer, as happens for tiled soundings and repeated runs
+    for rows in [np.array([0, 1]), np.array([2]), np.array([0, 1, 2])]:
+        layer = victim.build_soundings_layer(soundings, rows)
+        assert sorted(arcpy.da.FeatureClassToNumPyArray(layer, ['sounding'])['sounding'].tolist()) == rows.tolist()
+
+
+def test_build_geometry_layer_batches(victim):
+    features = FeatureStore.from_features('Point', [{'geometry': {'type': 'Point', 'coordinates': [-70.9 + index / 10, 42.3]},
+                                                     'properties': {}} for index in range(3)])
+    for rows in [np.array([0, 1]), np.array([2])]:
+        layer, object_ids = victim.build_geometry_layer('Point', features, rows)
+        assert len(object_ids) == len(rows)
+        assert int(arcpy.management.GetCount(layer)[0]) == len(rows)
+
+
+def test_get_overlapping_cells_unreadable(victim, tmp_path):
+    missing_file = str(tmp_path / 'US5GONE.000')
+    # A cell that cannot be opened is kept for OGR instead of stopping the pre-filter
+    assert victim.get_overlapping_cells([missing_file]) == [missing_file]
@@ -0,0 +1,67 @@
+import struct
+
+
+UPDATE_FIELDS = {  # Labels, formats and struct layout of the S-57 update record fields
+    'FRID': ('RCNM!RCID!PRIM!GRUP!OBJL!RVER!RUIN', '(b11,b14,2b11,2b12,b11)', '<BIBBHHB'),
+    'FOID': ('AGEN!FIDN!FIDS', '(b12,b14,b12)', '<HIH'),
+    'FSPC': ('FSUI!FSIX!NSPT', '(b11,2b12)', '<BHH'),
+    'FSPT': ('*NAME!ORNT!USAG!MASK', '(B(40),3b11)', '<5s3B'),
+    'VRID': ('RCNM!RCID!RVER!RUIN', '(b11,b14,b12,b11)', '<BIHB'),
+    'VRPC': ('VPUI!VPIX!NVPT', '(b11,2b12)', '<BHH'),
+    'VRPT': ('*NAME!ORNT!USAG!TOPI!MASK', '(B(40),4b11)', '<5s4B')
+}
+
+
+def iso8211_record(leader_id, fields, control_length=b'  '):
+    """
+    Build the bytes of one ISO 8211 record for test files
+    :param bytes leader_id: L for the DDR, D for data records
+    :param list[(str, bytes)] fields: Tag and data of each field, data includes the field terminator
+    :param bytes control_length: Field control length, 09 for the DDR
+    :returns bytes: Leader, directory and field area
+    """
+
+    directory = b''
+    area = b''
+    for tag, data in fields:
+        directory += tag.encode() + b'%03d' % len(data) + b'%04d' % len(area)
+        area += data
+    directory += b'\x1e'
+    base_address = 24 + len(directory)
+    length = base_address + len(area)
+    leader = b'%05d' % length + b'3' + leader_id + b'E1 ' + control_length + b'%05d' % base_address + b' ! 3404'
+    return leader + directory + area
+
+
+def name(rcnm, rcid):
+    """
+    Pack an S-57 record name for FSPT/VRPT pointers
+    :param int rcnm: Record name, ie: 130 for an edge
+    :param int rcid: Record identifier
+    :returns bytes: The 5 byte NAME subfield
+    """
+
+    return struct.pack('<BI', rcnm, rcid)
+
+
+def write_update(path, records):
+    """
+    Write a minimal S-57 update file holding only UPDATE_FIELDS records
+    :param pathlib.Path path: Update file, ie: US5BOSBE.001
+    :param list[list[(str, tuple|list[tuple])]] records: Fields of each record, a list of groups for FSPT/VRPT
+    :returns str: Update file path
+    """
+
+    ddr_fields = [('0000', b'0000;&   \x1e'), ('0001', b'0100;&   ISO 8211 Record Identifier\x1f\x1f(b12)\x1e')]
+    for tag, (labels, formats, _) in UPDATE_FIELDS.items():
+        ddr_fields.append((tag, b'1600;&   ' + tag.encode() + b'\x1f' + labels.encode() + b'\x1f' + formats.encode() + b'\x1e'))
+    data = iso8211_record(b'L', ddr_fields, b'09')
+    for record_id, fields in enumerate(records, 1):
+        record_fields = [('0001', struct.pack('<H', record_id) + b'\x1e')]
+        for tag, values in fields:
+            layout = UPDATE_FIELDS[tag][2]
+            groups = values if tag in ['FSPT', 'VRPT'] else [values]
+            record_fields.append((tag, b''.join(struct.pack(layout, *group) for group in groups) + b'\x1e'))
+        data += iso8211_record(b'D', record_fields)
+    path.write_bytes(data)
+    return str(path)
@@ -0,0 +1,56 @@
+import pathlib
+
+from helpers.enc_cache import ENCCache
+
+
+REPO = pathlib.Path(__file__).parents[2]
+ENC_FILE = str(REPO / 'inputs' / 'US5BOSBE.000')
+
+
+def test_get_key(tmp_path, monkeypatch):
+    monkeypatch.setenv('OGR_S57_OPTIONS', 'SPLIT_MULTIPOINT=OFF')
+    key = ENCCache(tmp_path).get_key(ENC_FILE)
+    assert key == ENCCache(tmp_path, {}).get_key(ENC_FILE)
+    assert key != ENCCache(tmp_path, {'skip_layers': ['M_QUAL']}).get_key(ENC_FILE)
+    assert key != ENCCache(tmp_path).get_key(ENC_FILE, previous_key='abc')
+    monkeypatch.setenv('OGR_S57_OPTIONS', 'SPLIT_MULTIPOINT=ON,ADD_SOUNDG_DEPTH=ON')
+    assert key != ENCCache(tmp_path).get_key(ENC_FILE)
+
+
+def test_get_keys(tmp_path):
+    cache = ENCCache(tmp_path)
+    keys = cache.get_keys(ENC_FILE, [ENC_FILE])
+    assert keys[0] == cache.get_key(ENC_FILE)
+    assert keys[1] == cache.get_key(ENC_FILE, keys[0])
+
+
+def test_get_keys_added_update(tmp_path):
+    cache = ENCCache(tmp_path)
+    keys = cache.get_keys(ENC_FILE, [ENC_FILE])
+    # A new update extends the chain, so the keys of the cell before it still match
+    added = cache.get_keys(ENC_FILE, [ENC_FILE, ENC_FILE])
+    assert added[:2] == keys
+    assert added[2] not in keys
+
+
+def test_save_load(tmp_path):
+    cache = ENCCache(tmp_path / 'cache')
+    cell = {'coverage': [], 'unknown': ['GeometryCollection']}
+    assert cache.load('missing') is None
+    cache.save('key', cell)
+    assert cache.load('key') == cell
+    assert not list((tmp_path / 'cache').glob('*.tmp'))
+
+
+def test_load_corrupt(tmp_path):
+    cache = ENCCache(tmp_path)
+    cache.save('truncated', {'unknown': list(range(1000)), 'name': 'US5BOSBE'})
+    path = cache.get_path('truncated')
+    contents = path.read_bytes()
+    for length in range(0, len(contents), 7):
+        path.write_bytes(contents[:length])
+        assert cache.load('truncated') is None
+    path.write_bytes(contents[:-1] + b'\xff')
+    assert cache.load('truncated') is None
+    cache.get_path('corrupt').write_bytes(b'not a pickle')
+    assert cache.load('corrupt') is None
@@ -0,0 +1,67 @@
+import pytest
+
+from iso8211_writer import iso8211_record
+from helpers.enc_catalog import find_catalog, read_catalog
+
+
+CATD_LABELS = 'RCNM!RCID!FILE!LFIL!VOLM!IMPL!SLAT!WLON!NLAT!ELON!CRCS!COMT'
+CATD_FORMATS = '(A(2),I(10),3A,A(3),4R,2A)'
+
+
+def write_catalog(path, entries):
+    ddr = iso8211_record(b'L', [
+        ('0000', b'0000;&   \x1e'),
+        ('0001', b'0100;&   DDF RECORD IDENTIFIER\x1e'),
+        ('CATD', b'1600;&   Catalogue Directory field\x1f' + CATD_LABELS.encode() + b'\x1f' + CATD_FORMATS.encode() + b'\x1e')
+    ], b'09')
+    records = b''
+    for rcid, (file, impl, bounds) in enumerate(entries, 1):
+        variable = [str(value).encode() + b'\x1f' for value in bounds + ['', '']]
+        catd = b'CD%10d' % rcid + file.encode() + b'\x1f\x1fV01X01\x1f' + impl.encode() + b''.join(variable) + b'\x1e'
+        records += iso8211_record(b'D', [('0001', b'%d\x1e' % rcid), ('CATD', catd)])
+    path.write_bytes(ddr + records)
+
+
+@pytest.fixture
+def exchange_set(tmp_path):
+    root = tmp_path / 'ENC_ROOT'
+    root.mkdir()
+    write_catalog(root / 'CATALOG.031', [
+        ('CATALOG.031', 'ASC', ['', '', '', '']),
+        ('US5BOSBE\\1\\0\\US5BOSBE.000', 'BIN', [42.225, -70.95, 42.3, -70.875]),
+        ('US5BOSBE\\1\\0\\US5BOSBE.001', 'BIN', ['', '', '', '']),
+        ('US4MA13M\\2\\0\\US4MA13M.000', 'BIN', ['', '', '', ''])
+    ])
+    return tmp_path
+
+
+def test_find_catalog(exchange_set):
+    assert find_catalog(str(exchange_set)) == exchange_set / 'ENC_ROOT' / 'CATALOG.031'
+    assert find_catalog(str(exchange_set / 'ENC_ROOT' / 'missing')) is None
+
+
+def test_read_catalog(exchange_set):
+    cells = read_catalog(find_catalog(str(exchange_set)))
+    folder = exchange_set / 'ENC_ROOT'
+    assert [cell['path'] for cell in cells] == [str(folder / 'US5BOSBE/1/0/US5BOSBE.000'), str(folder / 'US4MA13M/2/0/US4MA13M.000')]
+    assert cells[0]['bounds'] == (-70.95, 42.225, -70.875, 42.3)
+    assert cells[0]['updates'] == [str(folder / 'US5BOSBE/1/0/US5BOSBE.001')]
+    assert cells[1]['bounds'] is None
+
+
+def test_read_catalog_update_folders(tmp_path):
+    write_catalog(tmp_path / 'CATALOG.031', [
+        ('US5BOSBE\\24\\2\\US5BOSBE.002', 'BIN', ['', '', '', '']),
+        ('US5BOSBE\\24\\0\\US5BOSBE.000', 'BIN', [42.225, -70.95, 42.3, -70.875]),
+        ('US5BOSBE\\24\\1\\US5BOSBE.001', 'BIN', ['', '', '', '']),
+        ('US4MA13M\\3\\1\\US4MA13M.001', 'BIN', ['', '', '', ''])
+    ])
+    cells = read_catalog(tmp_path / 'CATALOG.031')
+    assert len(cells) == 2
+    assert cells[0] == {
+        'path': str(tmp_path / 'US5BOSBE/24/0/US5BOSBE.000'),
+        'bounds': (-70.95, 42.225, -70.875, 42.3),
+        'updates': [str(tmp_path / 'US5BOSBE/24/1/US5BOSBE.001'), str(tmp_path / 'US5BOSBE/24/2/US5BOSBE.002')]
+    }
+    # No base cell entry, the path is left for the engine to skip
+    assert cells[1]['path'] == str(tmp_path / 'US4MA13M/3/1/US4MA13M.000')
@@ -0,0 +1,41 @@
+import pytest
+import numpy as np
+
+from helpers.enc_clipping import clip_store
+from helpers.feature_store import FeatureStore
+from helpers.sheets_footprint import SheetsFootprint
+from helpers.spatial import get_geometries, get_polygons
+
+
+SHEETS = [[np.array([[0, 0], [0, 10], [10, 10], [10, 0], [0, 0]], dtype=np.float64)]]
+
+
+def polygon(rings, properties):
+    return {'type': 'Feature', 'geometry': {'type': 'Polygon', 'coordinates': rings}, 'properties': properties}
+
+
+def test_clip_store():
+    shapely = pytest.importorskip('shapely')
+    footprint = SheetsFootprint(get_polygons(SHEETS))
+    store = FeatureStore.from_features('Polygon', [
+        polygon([[[2, 2], [2, 4], [4, 4], [4, 2], [2, 2]]], {'OBJL': 42, 'DRVAL1': 5.0}),
+        polygon([[[8, 2], [8, 4], [14, 4], [14, 2], [8, 2]]], {'OBJL': 42, 'DRVAL1': 10.0}),
+        polygon([[[20, 2], [20, 4], [24, 4], [24, 2], [20, 2]]], {'OBJL': 71}),
+        # U shape crossing out of the sheet twice, clipped into two parts
+        polygon([[[-2, 1], [-2, 5], [2, 5], [2, 4], [-1, 4], [-1, 2], [2, 2], [2, 1], [-2, 1]]], {'OBJL': 42, 'DRVAL1': 20.0}),
+        # Touching the sheet edge from outside
+        polygon([[[10, 6], [10, 8], [12, 8], [12, 6], [10, 6]]], {'OBJL': 42})
+    ])
+    store.passed = np.array([True, True, False, True, True])
+    clipped_store, clipped = clip_store(store, footprint)
+    assert clipped == 2
+    assert len(clipped_store) == 6
+    assert clipped_store.passed.tolist() == [True, False, True, True, True, True]
+    assert clipped_store.get_values('clipped').tolist() == [None, None, None, 1, 1, 1]
+    assert clipped_store.get_values('DRVAL1').tolist() == [5.0, None, None, 10.0, 20.0, 20.0]
+    areas = shapely.area(get_geometries(clipped_store))
+    assert np.allclose(areas, [4, 8, 4, 4, 2, 2])
+    assert np.all(shapely.covers(footprint.union, get_geometries(clipped_store)[3:]))
+
+    tiled_store, _ = clip_store(store, footprint, memory_limit=300)
+    assert tiled_store.get_values('DRVAL1').tolist() == clipped_store.get_values('DRVAL1').tolist()
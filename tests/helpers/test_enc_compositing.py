@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+
+from helpers.enc_compositing import get_covered_mask, get_duplicate_mask, get_foid_keys, get_sounding_keys, get_usage_band
+from helpers.feature_store import FeatureStore
+from helpers.spatial import get_geometries, get_polygons
+
+
+def point(x, properties):
+    return {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [x, 0]}, 'properties': properties}
+
+
+def test_get_duplicate_mask():
+    store = FeatureStore.from_features('Point', [
+        point(0, {'AGEN': 550, 'FIDN': 1, 'FIDS': 1}),
+        point(1, {'AGEN': 550, 'FIDN': 1, 'FIDS': 1}),
+        point(2, {'AGEN': 550, 'FIDN': 2, 'FIDS': 1}),
+        point(3, {'AGEN': None, 'FIDN': None, 'FIDS': None}),
+        point(4, {'AGEN': 550, 'FIDN': 2, 'FIDS': 1}),
+        point(5, {'AGEN': None, 'FIDN': None, 'FIDS': None})
+    ])
+    keys, valid = get_foid_keys(store)
+    assert valid.tolist() == [True, True, True, False, True, False]
+    assert keys[0] == keys[1] and keys[0] != keys[2]
+    bands = np.array([4, 5, 4, 4, 4, 5])
+    assert get_duplicate_mask(keys, valid, bands).tolist() == [False, True, True, True, False, True]
+
+
+def test_get_usage_band():
+    assert get_usage_band('charts/US5BOSBE.000') == 5
+    assert get_usage_band('charts/US4MA04M.000') == 4
+    assert get_usage_band('charts/survey.000') == 0
+
+
+def test_get_covered_mask():
+    pytest.importorskip('shapely')
+    store = FeatureStore.from_features('Point', [point(x, {'OBJL': 42}) for x in [0.5, 1.5, 2.5, 0.5]])
+    bands = np.array([4, 4, 5, 5])
+    square = [np.array([(0, -1), (2, -1), (2, 1), (0, 1), (0, -1)], dtype=float)]
+    coverages = {5: get_polygons([square]), 4: get_polygons([[ring * 10 for ring in square]])}
+    assert get_covered_mask(get_geometries(store), bands, coverages).tolist() == [True, True, False, False]
+
+
+def test_get_sounding_keys():
+    store = FeatureStore.from_features('Point', [
+        point(0, {'AGEN': 550, 'FIDN': 7, 'FIDS': 1, 'DEPTH': 2.5}),
+        point(1, {'AGEN': 550, 'FIDN': 7, 'FIDS': 1, 'DEPTH': 3.5}),
+        point(0, {'AGEN': 550, 'FIDN': 7, 'FIDS': 1, 'DEPTH': 2.5}),
+        point(4, {'AGEN': 550, 'FIDN': 8, 'FIDS': 1})
+    ])
+    keys, valid = get_foid_keys(store)
+    keys = get_sounding_keys(store, keys)
+    assert keys.shape == (4, 3)
+    assert keys[3, 1:].tolist() == [0, 0]
+    assert get_duplicate_mask(keys, valid, np.array([4, 4, 5, 4])).tolist() == [False, True, True, True]
@@ -0,0 +1,28 @@
+import pytest
+import pathlib
+import numpy as np
+
+from helpers.enc_coverage import extents_intersect, get_bounds_mask, get_cell_extent
+
+
+REPO = pathlib.Path(__file__).parents[2]
+INPUTS = REPO / 'inputs'
+ENC_FILE = str(INPUTS / 'US5BOSBE.000')
+
+
+def test_extents_intersect():
+    assert extents_intersect((0, 0, 1, 1), [(5, 5, 6, 6), (1, 1, 2, 2)])
+    assert not extents_intersect((0, 0, 1, 1), [(5, 5, 6, 6), (1.5, 0, 2, 1)])
+
+
+def test_get_cell_extent():
+    xmin, ymin, xmax, ymax = get_cell_extent(ENC_FILE)
+    assert xmin == pytest.approx(-70.95)
+    assert ymin == pytest.approx(42.225)
+    assert xmax == pytest.approx(-70.875)
+    assert ymax == pytest.approx(42.3)
+
+
+def test_get_bounds_mask():
+    bounds = np.array([[0, 0, 1, 1], [3, 3, 4, 4], [np.nan, np.nan, np.nan, np.nan]])
+    assert get_bounds_mask(bounds, [(0.5, 0.5, 2, 2), (10, 10, 11, 11)]).tolist() == [True, False, False]
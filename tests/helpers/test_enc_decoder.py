@@ -0,0 +1,140 @@
+import pytest
+import shutil
+import pathlib
+import numpy as np
+
+ogr = pytest.importorskip('osgeo.ogr')
+
+from iso8211_writer import write_update
+from helpers.enc_decoder import (apply_enc_updates, decode_enc_file, get_multipoint_coordinates, get_store_foids, is_enc_cached, merge_cells,
+                                 read_enc_file, stage_cell)
+from helpers.iso8211 import ISO8211File
+
+
+REPO = pathlib.Path(__file__).parents[2]
+INPUTS = REPO / 'inputs'
+ENC_FILE = str(INPUTS / 'US5BOSBE.000')
+GEOMETRY_TYPES = ['Point', 'LineString', 'Polygon']
+
+
+@pytest.fixture(autouse=True)
+def s57_options(monkeypatch):
+    monkeypatch.setenv('OGR_S57_OPTIONS', 'SPLIT_MULTIPOINT=OFF')
+
+
+def get_area_features(enc_path, objl):
+    """Feature records of one area object class whose FOID is only used once, ie: not split across records"""
+
+    features = {}
+    with ISO8211File(enc_path) as enc_file:
+        for record in enc_file:
+            frid = record.get('FRID')
+            if frid and frid['PRIM'] == 3 and frid['OBJL'] == objl:
+                foid = record.get('FOID')
+                features.setdefault((foid['AGEN'], foid['FIDN'], foid['FIDS']), []).append(frid)
+    return {foid: frids[0] for foid, frids in features.items() if len(frids) == 1}
+
+
+def test_get_multipoint_coordinates():
+    soundings = ogr.Geometry(ogr.wkbMultiPoint25D)
+    points = ogr.Geometry(ogr.wkbMultiPoint)
+    for x, y, z in [(-70.9, 42.3, 5.5), (-70.8, 42.2, 12.0)]:
+        sounding = ogr.Geometry(ogr.wkbPoint25D)
+        sounding.AddPoint(x, y, z)
+        soundings.AddGeometry(sounding)
+        point = ogr.Geometry(ogr.wkbPoint)
+        point.AddPoint_2D(x, y)
+        points.AddGeometry(point)
+    assert get_multipoint_coordinates(soundings).tolist() == [[-70.9, 42.3, 5.5], [-70.8, 42.2, 12.0]]
+    coordinates = get_multipoint_coordinates(points)
+    assert coordinates[:, :2].tolist() == [[-70.9, 42.3], [-70.8, 42.2]]
+    assert np.isnan(coordinates[:, 2]).all()
+
+
+def test_merge_cells(tmp_path):
+    whole = decode_enc_file(ENC_FILE)
+    parts = [decode_enc_file(ENC_FILE, None, None, ['SOUNDG']), decode_enc_file(ENC_FILE, None, ['SOUNDG'])]
+    assert len(parts[1]['MultiPoint']) == len(whole['MultiPoint']) and not parts[1]['coverage']
+    merged = merge_cells(ENC_FILE, parts)
+    assert merged['cache'] is None
+    for geom_type in GEOMETRY_TYPES:
+        assert len(merged[geom_type]) == len(whole[geom_type])
+    assert len(merged['MultiPoint']) == len(whole['MultiPoint'])
+    assert len(merged['coverage']) == len(whole['coverage'])
+    assert merged['unknown'] == whole['unknown']
+
+    assert merge_cells(ENC_FILE, parts, str(tmp_path))['cache'] == 'miss'
+    cached = read_enc_file(ENC_FILE, str(tmp_path))
+    assert cached['cache'] == 'hit'
+    assert len(cached['Polygon']) == len(whole['Polygon'])
+
+
+def test_apply_enc_updates(tmp_path):
+    base_path = str(tmp_path / 'US5BOSBE.000')
+    shutil.copy(ENC_FILE, base_path)
+    cell = decode_enc_file(base_path)
+    cell['unknown'] = ['GEOMETRYCOLLECTION', 'GEOMETRYCOLLECTION']
+    (deleted, deleted_frid), (modified, modified_frid) = list(get_area_features(base_path, 42).items())[:2]  # DEPARE
+
+    def frid(values, ruin):
+        return ('FRID', (100, values['RCID'], values['PRIM'], values['GRUP'], values['OBJL'], values['RVER'] + 1, ruin))
+
+    # Delete one area feature and bump the version of another, OGR then applies the file when the cell is opened
+    update_path = write_update(tmp_path / 'US5BOSBE.001', [
+        [frid(deleted_frid, 2), ('FOID', deleted)],
+        [frid(modified_frid, 3), ('FOID', modified)]
+    ])
+    polygons = len(cell['Polygon'])
+    apply_enc_updates(base_path, cell, [], [update_path])
+    foids = list(get_store_foids(cell['Polygon']))
+    assert len(cell['Polygon']) == polygons - 1
+    assert deleted not in foids
+    assert foids.count(modified) == 1
+    assert cell['unknown'] == ['GEOMETRYCOLLECTION']
+    assert cell['links'] is not None and deleted_frid['RCID'] not in cell['links']['features']
+
+
+def test_read_enc_file_update_folder(tmp_path):
+    base_path = str(tmp_path / 'cells' / 'US5BOSBE.000')
+    pathlib.Path(base_path).parent.mkdir()
+    shutil.copy(ENC_FILE, base_path)
+    (deleted, deleted_frid), = list(get_area_features(base_path, 42).items())[:1]  # DEPARE
+    frid = (100, deleted_frid['RCID'], deleted_frid['PRIM'], deleted_frid['GRUP'], deleted_frid['OBJL'], deleted_frid['RVER'] + 1, 2)
+    # Exchange set catalogs may list updates in another folder than the base cell
+    (tmp_path / 'updates').mkdir()
+    update_path = write_update(tmp_path / 'updates' / 'US5BOSBE.001', [[('FRID', frid), ('FOID', deleted)]])
+
+    with stage_cell(base_path, [update_path]) as staged_path:
+        assert pathlib.Path(staged_path).parent != pathlib.Path(base_path).parent
+        assert pathlib.Path(staged_path).with_suffix('.001').exists()
+    assert not pathlib.Path(staged_path).exists()
+    with stage_cell(base_path, []) as staged_path:
+        assert staged_path == base_path
+
+    polygons = len(read_enc_file(base_path)['Polygon'])
+    cell = read_enc_file(base_path, update_paths=[update_path])
+    assert len(cell['Polygon']) == polygons - 1
+    assert deleted not in list(get_store_foids(cell['Polygon']))
+
+    cache_folder = str(tmp_path / 'cache')
+    assert read_enc_file(base_path, cache_folder, update_paths=[update_path])['cache'] == 'miss'
+    assert is_enc_cached(base_path, cache_folder, update_paths=[update_path])
+    assert not is_enc_cached(base_path, cache_folder)
+    cached = read_enc_file(base_path, cache_folder, update_paths=[update_path])
+    assert cached['cache'] == 'hit'
+    assert len(cached['Polygon']) == polygons - 1
+
+
+def test_is_enc_cached_added_update(tmp_path):
+    base_path = str(tmp_path / 'US5BOSBE.000')
+    shutil.copy(ENC_FILE, base_path)
+    cache_folder = str(tmp_path / 'cache')
+    assert not is_enc_cached(base_path, cache_folder)
+    assert read_enc_file(base_path, cache_folder)['cache'] == 'miss'
+    (deleted, deleted_frid), = list(get_area_features(base_path, 42).items())[:1]  # DEPARE
+    frid = (100, deleted_frid['RCID'], deleted_frid['PRIM'], deleted_frid['GRUP'], deleted_frid['OBJL'], deleted_frid['RVER'] + 1, 2)
+    write_update(tmp_path / 'US5BOSBE.001', [[('FRID', frid), ('FOID', deleted)]])
+    # The cached base is reused and only the new update is applied
+    assert is_enc_cached(base_path, cache_folder)
+    assert read_enc_file(base_path, cache_folder)['cache'] == 'updated'
+    assert read_enc_file(base_path, cache_folder)['cache'] == 'hit'
@@ -0,0 +1,61 @@
+import pytest
+import pathlib
+
+from collections import Counter
+from helpers.enc_index import get_layer_groups, read_cell_index, read_cell_indexes
+from helpers.iso8211 import ISO8211File, ISO8211Exception, READ_ERRORS
+
+
+REPO = pathlib.Path(__file__).parents[2]
+INPUTS = REPO / 'inputs'
+ENC_FILE = str(INPUTS / 'US5BOSBE.000')
+
+
+def test_read_cell_index():
+    index = read_cell_index(ENC_FILE)
+    assert index['name'] == 'US5BOSBE.000'
+    assert index['usage'] == 5
+    assert index['records']['features'] == 2047
+    assert index['records']['edges'] == 1723
+    assert len(index['foids']) == 2047
+    assert sum(index['objl'].values()) == 2047
+
+
+def test_get_layer_groups():
+    # SOUNDG 129, DEPARE 42, LNDARE 71, BOYLAT 17, unknown OBJL 9999
+    groups = get_layer_groups(Counter({129: 50, 42: 30, 71: 15, 17: 10, 9999: 5}), 2)
+    assert groups == [['DEPARE', 'LNDARE', 'BOYLAT'], ['SOUNDG']]
+    assert get_layer_groups(Counter({129: 50}), 4) == [['SOUNDG']]
+    index = read_cell_index(ENC_FILE)
+    groups = get_layer_groups(index['objl'], 3)
+    assert len(groups) == 3
+    assert sum(len(group) for group in groups) == len(set().union(*groups))
+
+
+def test_read_cell_indexes(tmp_path):
+    empty_file = tmp_path / 'US5EMPTY.000'
+    empty_file.write_bytes(b'')
+    missing_file = tmp_path / 'US5GONE.000'
+    indexes, unreadable = read_cell_indexes([ENC_FILE, str(empty_file), str(missing_file)])
+    assert [index['name'] for index in indexes] == ['US5BOSBE.000']
+    assert unreadable == [str(empty_file), str(missing_file)]
+
+
+def test_iso8211_file_close():
+    with ISO8211File(ENC_FILE) as enc_file:
+        record = next(iter(enc_file))
+        assert record.tags == ['0001', 'DSID', 'DSSI']
+    assert enc_file.data.closed
+    with pytest.raises(ISO8211Exception):
+        ISO8211File(str(INPUTS / 'invreq_lookup.yaml'))
+
+
+def test_iso8211_file_close_on_error(tmp_path, monkeypatch):
+    closed = []
+    close = ISO8211File.close
+    monkeypatch.setattr(ISO8211File, 'close', lambda iso_file: closed.append(iso_file.data) or close(iso_file))
+    invalid_file = tmp_path / 'US5INVAL.000'
+    invalid_file.write_bytes(b'x' * 40)
+    with pytest.raises(READ_ERRORS):
+        ISO8211File(str(invalid_file))
+    assert len(closed) == 1 and closed[0].closed
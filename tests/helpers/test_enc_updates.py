@@ -0,0 +1,117 @@
+import pytest
+import pathlib
+
+from iso8211_writer import name, write_update
+from helpers.enc_updates import apply_pointer_update, get_base_path, get_update_changes, read_links
+from helpers.iso8211 import ISO8211File
+
+
+REPO = pathlib.Path(__file__).parents[2]
+INPUTS = REPO / 'inputs'
+ENC_FILE = str(INPUTS / 'US5BOSBE.000')
+F1, F2, F3, F4, F5, F6, F8, F9 = [(550, fidn, 1) for fidn in [1, 2, 3, 4, 5, 6, 8, 9]]
+
+
+def feature(rcid, objl, ruin, foid, *fields):
+    return [('FRID', (100, rcid, 2, 2, objl, 2, ruin)), ('FOID', foid)] + list(fields)
+
+
+def vector(rcnm, rcid, ruin, *fields):
+    return [('VRID', (rcnm, rcid, 2, ruin))] + list(fields)
+
+
+@pytest.fixture
+def links():
+    return read_links(ENC_FILE)
+
+
+@pytest.fixture
+def cell_links():
+    return {
+        'features': {
+            1: {'foid': F1, 'objl': 42, 'spatial': [(130, 10)]},
+            2: {'foid': F2, 'objl': 43, 'spatial': [(130, 11), (130, 12)]},
+            3: {'foid': F3, 'objl': 75, 'spatial': [(110, 5)]},
+            4: {'foid': F4, 'objl': 71, 'spatial': [(130, 13)]},
+            5: {'foid': F5, 'objl': 30, 'spatial': [(130, 20)]},
+            6: {'foid': F6, 'objl': 86, 'spatial': [(110, 6)]},
+            8: {'foid': F8, 'objl': 30, 'spatial': [(130, 14), (130, 15)]}
+        },
+        'edges': {
+            10: [(120, 1), (120, 2)],
+            11: [(120, 2), (120, 3)],
+            12: [(120, 3), (120, 4)],
+            13: [(120, 7), (120, 8)],
+            14: [(120, 9), (120, 10)],
+            15: [(120, 10), (120, 11)],
+            20: [(120, 20), (120, 21)]
+        }
+    }
+
+
+def test_apply_pointer_update():
+    pointers = [(130, 1), (130, 2), (130, 3)]
+    apply_pointer_update(pointers, (1, 2, 1), [(130, 9)])
+    assert pointers == [(130, 1), (130, 9), (130, 2), (130, 3)]
+    apply_pointer_update(pointers, (2, 1, 2), [])
+    assert pointers == [(130, 2), (130, 3)]
+    apply_pointer_update(pointers, (3, 2, 1), [(130, 7)])
+    assert pointers == [(130, 2), (130, 7)]
+
+
+def test_get_base_path():
+    assert get_base_path('charts/US5BOSBE.003') == str(pathlib.Path('charts/US5BOSBE.000'))
+    assert get_base_path('charts/US5BOSBE.000') == str(pathlib.Path('charts/US5BOSBE.000'))
+
+
+def test_iso8211_dataset_identification():
+    dsid = next(iter(ISO8211File(ENC_FILE))).get('DSID')
+    assert dsid['DSNM'] == 'US5BOSBE.000'
+    assert dsid['INTU'] == 5
+
+
+def test_read_links(links):
+    assert len(links['features']) == 2047
+    assert len(links['edges']) == 1723
+    assert all(len(nodes) == 2 for nodes in links['edges'].values())
+
+
+def test_get_update_changes(tmp_path, cell_links):
+    update_path = write_update(tmp_path / 'US5BOSBE.001', [
+        vector(120, 1, 3),  # Moved connected node, reshapes edge 10 of F1
+        vector(130, 14, 2),  # Deleted edge
+        vector(130, 12, 3, ('VRPC', (3, 2, 1)), ('VRPT', [(name(120, 5), 255, 255, 2, 255)])),
+        feature(8, 30, 3, F8, ('FSPC', (2, 1, 1))),
+        feature(3, 75, 2, F3),
+        feature(4, 71, 3, F4, ('FSPC', (1, 2, 1)), ('FSPT', [(name(130, 16), 1, 1, 255)])),
+        feature(6, 86, 2, F6),
+        feature(7, 86, 1, F6, ('FSPT', [(name(110, 7), 255, 255, 255)])),  # Same FOID under a new record
+        feature(9, 42, 1, F9, ('FSPT', [(name(130, 10), 1, 1, 255)]))
+    ])
+    deleted, changed = get_update_changes(update_path, cell_links)
+    assert deleted == {F3}
+    assert changed == {F1: 42, F2: 43, F4: 71, F6: 86, F8: 30, F9: 42}
+    assert cell_links['edges'][12] == [(120, 3), (120, 5)]
+    assert 14 not in cell_links['edges']
+    assert cell_links['features'][4]['spatial'] == [(130, 13), (130, 16)]
+    assert cell_links['features'][8]['spatial'] == [(130, 15)]
+    assert cell_links['features'][7] == {'foid': F6, 'objl': 86, 'spatial': [(110, 7)]}
+    assert 3 not in cell_links['features'] and 6 not in cell_links['features']
+
+
+def test_get_update_changes_deleted_after_change(tmp_path, cell_links):
+    update_path = write_update(tmp_path / 'US5BOSBE.002', [
+        feature(1, 42, 3, F1, ('FSPC', (1, 2, 1)), ('FSPT', [(name(130, 11), 1, 1, 255)])),
+        feature(1, 42, 2, F1),
+        vector(120, 3, 3)  # Edges 11 and 12 of F2
+    ])
+    deleted, changed = get_update_changes(update_path, cell_links)
+    assert deleted == {F1}
+    assert changed == {F2: 43}
+    assert 1 not in cell_links['features']
+
+
+def test_get_update_changes_base_cell(links):
+    deleted, changed = get_update_changes(ENC_FILE, links)
+    assert not deleted
+    assert len(changed) == 2047
@@ -0,0 +1,106 @@
+import pytest
+import struct
+import numpy as np
+
+from helpers.feature_store import FeatureStore, SoundingsTable
+
+
+def polygon(rings, properties):
+    return {'type': 'Feature', 'geometry': {'type': 'Polygon', 'coordinates': rings}, 'properties': properties}
+
+
+@pytest.fixture
+def victim():
+    first = FeatureStore.from_features('Polygon', [
+        polygon([[(0, 0), (4, 0), (4, 4), (0, 0)], [(1, 1), (2, 1), (2, 2), (1, 1)]], {'OBJL': 42, 'DRVAL1': 1.5, 'COLOUR': ['1', '3']}),
+        polygon([[(5, 5), (6, 5), (6, 6), (5, 5)]], {'OBJL': 71, 'DRVAL1': None, 'COLOUR': None})
+    ])
+    second = FeatureStore.from_features('Polygon', [
+        polygon([[(9, 9), (8, 9), (8, 8), (9, 9)]], {'OBJL': 42, 'CATOBS': 3})
+    ])
+    return FeatureStore.concat([first, FeatureStore.empty('Polygon'), second])
+
+
+def test_concat(victim):
+    assert len(victim) == 3
+    assert victim.fields == ['OBJL', 'DRVAL1', 'COLOUR', 'CATOBS']
+    assert list(victim.rows(victim.fields)) == [
+        [42, 1.5, ['1', '3'], None],
+        [71, None, None, None],
+        [42, None, None, 3]
+    ]
+    assert list(victim.columns['OBJL'].dictionary) == [42, 71]
+
+
+def test_get_rings(victim):
+    rings = victim.get_rings(0)
+    assert len(rings) == 2
+    assert rings[1].tolist() == [[1, 1], [2, 1], [2, 2], [1, 1]]
+    assert victim.get_rings(2)[0][0].tolist() == [9, 9]
+
+
+def test_take(victim):
+    victim.passed = np.array([True, False, True])
+    subset = victim.take(np.array([2, 0]))
+    assert subset.get_values('OBJL').tolist() == [42, 42]
+    assert subset.get_values('CATOBS').tolist() == [3, None]
+    assert len(subset.get_rings(1)) == 2
+    assert subset.passed.tolist() == [True, True]
+
+
+def test_set_column(victim):
+    victim.set_column('invreq', [None, 'retain', None])
+    assert victim.get_values('invreq').tolist() == [None, 'retain', None]
+    assert victim.columns['invreq'].values.tolist() == ['retain']
+
+
+def test_soundings():
+    soundings = SoundingsTable.concat([
+        SoundingsTable.from_features([
+            {'geometry': {'coordinates': np.array([[0, 0, 1.5], [1, 1, 2.5]])}, 'properties': {'OBJL': 129, 'QUASOU': '6'}},
+            {'geometry': {'coordinates': np.array([[2, 2, 3.5]])}, 'properties': {'OBJL': 129, 'QUASOU': None}}
+        ]),
+        SoundingsTable.empty()
+    ])
+    assert len(soundings) == 3
+    assert soundings.parent_index.tolist() == [0, 0, 1]
+    assert soundings.depth.tolist() == [1.5, 2.5, 3.5]
+    soundings.set_column('asgnmt', [2, 1, 2])
+    assert list(soundings.rows(soundings.fields)) == [
+        [129, '6', 1.5, 2],
+        [129, '6', 2.5, 1],
+        [129, None, 3.5, 2]
+    ]
+    subset = soundings.take_parents(np.array([1]))
+    assert subset.x.tolist() == [2] and subset.depth.tolist() == [3.5]
+
+
+def wkb_polygon(rings):
+    data = struct.pack('<BII', 1, 3, len(rings))
+    for ring in rings:
+        data += struct.pack('<I', len(ring)) + np.array(ring, dtype='<f8').tobytes()
+    return data
+
+
+def test_lazy_wkb(victim):
+    rings = [[(0, 0), (4, 0), (4, 4), (0, 0)], [(1, 1), (2, 1), (2, 2), (1, 1)]]
+    lazy = FeatureStore.from_features('Polygon', [
+        {'geometry': {'wkb': wkb_polygon(rings), 'bbox': [0, 0, 4, 4]}, 'properties': {'OBJL': 42}},
+        {'geometry': {'wkb': wkb_polygon([[(5, 5), (6, 5), (6, 6), (5, 5)]]), 'bbox': [5, 5, 6, 6]}, 'properties': {'OBJL': 71}}
+    ])
+    joined = FeatureStore.concat([lazy, FeatureStore.empty('Polygon'), lazy.take(np.array([1]))])
+    assert joined.wkb is not None and len(joined) == 3
+    assert joined.bounds[2].tolist() == [5, 5, 6, 6]
+    assert [ring.tolist() for ring in joined.get_rings(0)] == [[list(point) for point in ring] for ring in rings]
+    assert joined.wkb is None
+    assert joined.get_rings(2)[0].tolist() == [[5, 5], [6, 5], [6, 6], [5, 5]]
+    mixed = FeatureStore.concat([victim, lazy])
+    assert len(mixed) == 5 and mixed.bounds[0].tolist() == [0, 0, 4, 4]
+
+
+def test_get_wkb(victim):
+    shapely = pytest.importorskip('shapely')
+    polygon = shapely.from_wkb(victim.get_wkb(0))
+    assert len(polygon.interiors) == 1
+    assert polygon.area == 7.5
+    assert shapely.from_wkb(victim.get_wkb(2)).exterior.coords[0] == (9, 9)
@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+
+from helpers.point_in_polygon import PointGrid, ray_cast
+from helpers.spatial import get_polygons
+
+
+def test_ray_cast():
+    square = np.array([[0, 0, 0, 2], [0, 2, 2, 2], [2, 2, 2, 0], [2, 0, 0, 0]], dtype=np.float64)
+    inside = ray_cast(np.array([1.0, 3.0, -1.0, 1.0]), np.array([1.0, 1.0, 1.0, 3.0]), square)
+    assert inside.tolist() == [True, False, False, False]
+    # West, east, south and north edges, a vertex, and just outside the east edge
+    inside = ray_cast(np.array([0.0, 2.0, 1.0, 1.0, 2.0, 2.000001]), np.array([1.0, 1.0, 0.0, 2.0, 2.0, 1.0]), square)
+    assert inside.tolist() == [True, True, True, True, True, False]
+    assert ray_cast(np.array([1.0]), np.array([1.0]), np.empty((0, 4))).tolist() == [False]
+
+
+def test_point_grid():
+    shapely = pytest.importorskip('shapely')
+    # Sheet with a hole and a small separate sheet
+    polygons = get_polygons([
+        [np.array([[0, 0], [0, 10], [10, 10], [10, 0], [0, 0]], dtype=np.float64),
+         np.array([[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]], dtype=np.float64)],
+        [np.array([[20, 0], [21, 0], [20.5, 3], [20, 0]], dtype=np.float64)]
+    ])
+    union = shapely.union_all(polygons)
+    grid = PointGrid(union, grid_size=32)
+    assert {PointGrid.INSIDE, PointGrid.OUTSIDE, PointGrid.BOUNDARY} == set(np.unique(grid.cells).tolist())
+
+    generator = np.random.default_rng(57)
+    x = generator.uniform(-2, 23, 20000)
+    y = generator.uniform(-2, 12, 20000)
+    expected = shapely.intersects_xy(union, x, y)
+    assert np.array_equal(grid.contains(x, y), expected)
+    assert grid.contains(np.array([5.0, 1.0, 21.0]), np.array([5.0, 1.0, 3.0])).tolist() == [False, True, False]
+
+    # Outer, hole and diagonal edges, and vertices, all count as inside like SelectLayerByLocation INTERSECT
+    x = np.array([0.0, 10.0, 5.0, 5.0, 0.0, 10.0, 4.0, 6.0, 5.0, 20.25, 20.5, 21.0, 10.5])
+    y = np.array([5.0, 5.0, 0.0, 10.0, 0.0, 10.0, 5.0, 6.0, 4.0, 1.5, 3.0, 0.0, 5.0])
+    assert np.array_equal(grid.contains(x, y), shapely.intersects_xy(union, x, y))
+    assert grid.contains(x, y).tolist() == [True] * 12 + [False]
+
+
+def test_point_grid_sheet_edges():
+    shapely = pytest.importorskip('shapely')
+    grid = PointGrid(shapely.box(0, 0, 8, 4))
+    x = np.array([0.0, 8.0, 4.0, 4.0, 4.0, 8.0, 0.0, 8.0 + 1e-9])
+    y = np.array([2.0, 2.0, 0.0, 4.0, 2.0, 4.0, 0.0, 2.0])
+    assert grid.contains(x, y).tolist() == [True, True, True, True, True, True, True, False]
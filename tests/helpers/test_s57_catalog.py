@@ -0,0 +1,26 @@
+import numpy as np
+
+from helpers.s57_catalog import S57Catalog, get_catalog
+
+
+def write_catalog_csv(folder):
+    (folder / 's57objectclasses.csv').write_text(
+        '"Code","ObjectClass","Acronym","Attribute_A","Attribute_B","Attribute_C","Class","Primitives"\n'
+        '71,Land area,LNDARE,"CONDTN;OBJNAM;NOBJNM;","INFORM;NINFOM;NTXTDS;","RECDAT;RECIND;SORDAT;SORIND;",G,Point;Line;Area;\n'
+        '129,Sounding,SOUNDG,"EXPSOU;NOBJNM;OBJNAM;","INFORM;NINFOM;","RECDAT;SORDAT;",G,Point;\n'
+        '159,Wreck,WRECKS,"CATWRK;EXPSOU;","INFORM;","SORDAT;",G,Point;Area;\n')
+
+
+def test_from_csv(tmp_path):
+    write_catalog_csv(tmp_path)
+    catalog = S57Catalog.from_csv(tmp_path)
+    assert catalog.class_codes['WRECKS'] == 159
+    assert catalog.class_codes['survey'] == 11003  # From class_code_lookup
+    assert catalog.get_acronyms(np.array([129, 71, 5000, 11003])).tolist() == ['SOUNDG', 'LNDARE', '', 'survey']
+
+
+def test_from_lookup():
+    catalog = S57Catalog.from_lookup()
+    assert catalog.get_acronyms(np.array([None, 129, -1, 99999], dtype=object)).tolist() == [None, 'SOUNDG', '', '']
+    assert catalog.get_acronyms(np.empty(0, dtype=np.int64)).tolist() == []
+    assert get_catalog() is get_catalog()
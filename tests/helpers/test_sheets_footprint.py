@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+
+from helpers.feature_store import FeatureStore
+from helpers.sheets_footprint import SheetsFootprint, get_passed_mask
+from helpers.spatial import get_geometries, get_points, get_polygons
+
+
+SHEETS = [[np.array([[0, 0], [0, 4], [4, 4], [4, 0], [0, 0]], dtype=np.float64)],
+          [np.array([[4, 0], [4, 4], [8, 4], [8, 0], [4, 0]], dtype=np.float64)],
+          [np.array([[20, 20], [20, 21], [21, 21], [21, 20], [20, 20]], dtype=np.float64)]]
+
+
+def test_classify():
+    pytest.importorskip('shapely')
+    footprint = SheetsFootprint(get_polygons(SHEETS))
+    bounds = np.array([
+        [3, 1, 5, 2],        # Across the shared edge of two sheets, inside the dissolved footprint
+        [1, 1, 1, 1],        # Point inside
+        [7, 3, 9, 5],        # Across the outer edge
+        [10, 10, 12, 12],    # Between sheets
+        [8, 2, 8, 2],        # Point on the outer edge
+        [20.5, 19, 20.5, 22] # Vertical line across a small sheet
+    ], dtype=np.float64)
+    inside, outside, edge = footprint.classify(bounds)
+    assert inside.tolist() == [True, True, False, False, False, False]
+    assert outside.tolist() == [False, False, False, True, False, False]
+    assert edge.tolist() == [False, False, True, False, True, True]
+    assert footprint.classify(np.empty((0, 4)))[0].tolist() == []
+
+
+def test_classify_margin():
+    pytest.importorskip('shapely')
+    footprint = SheetsFootprint(get_polygons(SHEETS))
+    bounds = np.array([
+        [1, 1, 2, 2],              # Well inside
+        [0.05, 1, 0.05, 1],        # Inside, near the outer edge
+        [8.05, 1, 8.05, 1],        # Outside, near the outer edge
+        [10, 10, 12, 12]           # Well outside
+    ], dtype=np.float64)
+    inside, outside, edge = footprint.classify(bounds)
+    assert inside.tolist() == [True, True, False, False]
+    assert outside.tolist() == [False, False, True, True]
+    # Features close to the footprint are left to the exact test
+    inside, outside, edge = footprint.classify(bounds, 0.1)
+    assert inside.tolist() == [True, False, False, False]
+    assert outside.tolist() == [False, False, False, True]
+    assert edge.tolist() == [False, True, True, False]
+
+
+def test_join():
+    pytest.importorskip('shapely')
+    sheets = [[np.array([[0, 0], [0, 4], [4, 4], [4, 0], [0, 0]], dtype=np.float64)],
+              [np.array([[2, 0], [2, 4], [6, 4], [6, 0], [2, 0]], dtype=np.float64)],
+              [np.array([[5, 0], [5, 4], [7, 4], [7, 0], [5, 0]], dtype=np.float64)]]
+    attributes = {'sheet_id': np.array([1, 2, 3], dtype=object),
+                  'scale': np.array([20000, 10000, None], dtype=object),
+                  'registry_n': np.array(['H1', 'H2', 'H3'], dtype=object)}
+    footprint = SheetsFootprint(get_polygons(sheets), attributes)
+    points = get_points(np.array([1.0, 3.0, 5.5, 6.5, 9.0]), np.array([1.0, 1.0, 1.0, 1.0, 1.0]))
+    joined = footprint.join(points)
+    assert joined.tolist() == [0, 1, 1, 2, -1]
+    tags = footprint.get_attributes(joined)
+    assert tags['scale'] == [20000, 10000, 10000, None, None]
+    assert tags['registry_n'] == ['H1', 'H2', 'H2', 'H3', None]
+    assert footprint.join(get_points(np.empty(0), np.empty(0))).tolist() == []
+
+
+def test_get_passed_mask():
+    shapely = pytest.importorskip('shapely')
+    sheets = get_polygons(SHEETS)
+    lines = FeatureStore.from_features('LineString', [
+        {'geometry': {'type': 'LineString', 'coordinates': coordinates}, 'properties': {}} for coordinates in [
+            [[1, 1], [2, 2]],            # Inside
+            [[7, 3], [9, 5]],            # Across the outer edge
+            [[9, 5], [9, 9]],            # Bbox touches no sheet
+            [[9, 3.5], [7.5, 5]],        # Bbox overlaps a sheet, line misses it
+            [[19, 22], [22, 19]],        # Across the small sheet
+            [[10, 10], [12, 12]]         # Between sheets
+        ]])
+    expected = [True, True, False, False, True, False]
+    assert get_passed_mask(sheets, lines).tolist() == expected
+    assert shapely.intersects(shapely.union_all(sheets), get_geometries(lines)).tolist() == expected
+    # A tiny memory limit builds the edge features in several batches with the same result
+    assert get_passed_mask(sheets, lines, memory_limit=1).tolist() == expected
+
+    points = FeatureStore.from_features('Point', [
+        {'geometry': {'type': 'Point', 'coordinates': coordinates}, 'properties': {}} for coordinates in [[1, 1], [8, 2], [10, 10]]])
+    assert get_passed_mask(sheets, points).tolist() == [True, True, False]
+    assert get_passed_mask(sheets, FeatureStore.empty('Polygon')).tolist() == []
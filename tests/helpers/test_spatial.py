@@ -0,0 +1,33 @@
+import pytest
+import numpy as np
+
+from helpers.feature_store import FeatureStore
+from helpers.spatial import get_geometries, get_points, get_polygons
+
+
+SHEETS = [[np.array([[0, 0], [0, 2], [2, 2], [2, 0], [0, 0]], dtype=np.float64)],
+          [np.array([[5, 5], [5, 6], [6, 6], [6, 5], [5, 5]], dtype=np.float64)]]
+
+
+def line(coordinates):
+    return {'type': 'Feature', 'geometry': {'type': 'LineString', 'coordinates': coordinates}, 'properties': {}}
+
+
+def test_get_geometries():
+    shapely = pytest.importorskip('shapely')
+    store = FeatureStore.from_features('LineString', [
+        line([[1, 1], [3, 3]]),
+        line([[3, 0], [4, 0]]),
+        line([[5.5, 4], [5.5, 7]])
+    ])
+    geometries = get_geometries(store)
+    assert shapely.get_num_coordinates(geometries).tolist() == [2, 2, 2]
+    assert shapely.intersects(get_polygons(SHEETS)[0], geometries).tolist() == [True, False, False]
+    assert shapely.get_coordinates(get_geometries(store, np.array([2]))).tolist() == [[5.5, 4], [5.5, 7]]
+
+
+def test_get_points():
+    shapely = pytest.importorskip('shapely')
+    points = get_points(np.array([1.0, 3.0]), np.array([1.0, 0.0]))
+    assert shapely.get_coordinates(points).tolist() == [[1, 1], [3, 0]]
+    assert len(get_polygons(SHEETS + [[]])) == 2
@@ -0,0 +1,46 @@
+import pytest
+import numpy as np
+
+from helpers.feature_store import FeatureStore
+from helpers.sheets_footprint import SheetsFootprint
+from helpers.spatial import get_geometries
+from helpers.spatial_tiles import GEOMETRY_OVERHEAD, get_geometry_sizes, get_tile_batches
+
+
+def test_get_geometry_sizes():
+    store = FeatureStore.from_features('LineString', [
+        {'type': 'Feature', 'geometry': {'type': 'LineString', 'coordinates': [[0, 0], [1, 1]]}, 'properties': {}},
+        {'type': 'Feature', 'geometry': {'type': 'LineString', 'coordinates': [[0, 0], [1, 1], [2, 2], [3, 3]]}, 'properties': {}}
+    ])
+    sizes = get_geometry_sizes(store, np.array([1, 0]))
+    assert sizes.tolist() == [4 * 16 * 2 + GEOMETRY_OVERHEAD, 2 * 16 * 2 + GEOMETRY_OVERHEAD]
+
+
+def test_get_tile_batches():
+    generator = np.random.default_rng(24)
+    corners = generator.uniform(0, 100, (1000, 2))
+    bounds = np.column_stack([corners, corners + generator.uniform(0, 2, (1000, 2))])
+    sizes = generator.integers(100, 1000, 1000)
+    batches = get_tile_batches(bounds, sizes, 10000)
+    assert len(batches) > 1
+    assert all(sizes[batch].sum() <= 10000 for batch in batches)
+    assert np.array_equal(np.sort(np.concatenate(batches)), np.arange(1000))
+    assert [batch.tolist() for batch in get_tile_batches(bounds, sizes, 0)] == [list(range(1000))]
+    assert [batch.tolist() for batch in get_tile_batches(bounds, sizes, -5)] == [list(range(1000))]
+    assert len(get_tile_batches(bounds[:0], sizes[:0], 10000)) == 1
+
+
+def test_tiled_filter_matches_untiled():
+    shapely = pytest.importorskip('shapely')
+    footprint = SheetsFootprint(np.array([shapely.box(10, 10, 40, 40), shapely.box(60, 50, 90, 70)]))
+    generator = np.random.default_rng(25)
+    starts = generator.uniform(0, 100, (500, 2))
+    features = [{'type': 'Feature', 'geometry': {'type': 'LineString', 'coordinates': [start.tolist(), (start + 5).tolist()]},
+                 'properties': {}} for start in starts]
+    store = FeatureStore.from_features('LineString', features)
+    rows = np.arange(len(store))
+    untiled = footprint.intersects(get_geometries(store, rows))
+    tiled = np.zeros(len(store), dtype=bool)
+    for batch in get_tile_batches(store.bounds, get_geometry_sizes(store, rows), 5000):
+        tiled[batch] = footprint.intersects(get_geometries(store, batch))
+    assert np.array_equal(tiled, untiled)